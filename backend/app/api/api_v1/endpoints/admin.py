@@ -1,47 +1,145 @@
-from typing import Any, List
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from typing import Any, List, Optional
+from functools import lru_cache
+import logging
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Response, BackgroundTasks
+from sqlalchemy.orm import Session, selectinload, raiseload
+from pydantic import TypeAdapter
+from sqlalchemy import func, desc, case, select, or_
 
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import get_admin_user, get_db
 from app.models.user import User
 from app.models.image import Image, ImagePrivacy
 from app.models.comment import Comment
 from app.models.like import Like
+from app.models.tag import ImageTag
+from app.models.album import Album, AlbumImage
+from app.models.follow import Follow
+from app.models.notification import Notification
 from app.schemas.user import User as UserSchema
 from app.schemas.image import Image as ImageSchema
 from app.services.storage_service import storage_service
+from app.services.cache import cache_service, invalidate_cache
+from app.services.rate_limiter import rate_limiter
+from app.utils.pagination import encode_cursor, order_newest_first
 from app.models.rate_limit import RateLimit
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
+# Every admin endpoint requires a superuser
+router = APIRouter(dependencies=[Depends(get_admin_user)])
 
-def check_admin_permissions(current_user: User) -> None:
-    """Check if current user has admin permissions"""
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=403, 
-            detail="Insufficient permissions. Admin access required."
-        )
+# Serializers for the admin list endpoints. Returning pre-rendered JSON skips
+# FastAPI's validate -> jsonable_encoder -> json.dumps pass over every row.
+users_adapter = TypeAdapter(List[UserSchema])
+images_adapter = TypeAdapter(List[ImageSchema])
+
+
+def json_response(adapter: TypeAdapter, rows: list) -> Response:
+    """Validate ORM rows against a schema and render them straight to JSON bytes."""
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(rows, from_attributes=True)),
+        media_type="application/json",
+    )
+
+
+@lru_cache(maxsize=256)
+def window_text(window: int) -> str:
+    """Short label for a rate limit window in seconds, e.g. "1h" or "15m"."""
+    return f"{window // 3600}h" if window >= 3600 else f"{window // 60}m"
+
+
+def delete_storage_files(file_names: List[str]) -> None:
+    """Remove files from MinIO after the response has been sent."""
+    try:
+        storage_service.delete_files(file_names)
+    except Exception:
+        logger.exception(f"Error deleting files from storage: {file_names}")
+
+
+def bulk_delete_user(db: Session, user_id: int) -> None:
+    """
+    Delete a user and everything they own with set-based DELETEs.
+    
+    Mirrors the ORM cascades on User, Image and Comment without loading
+    every row into the session first. Order matters: rows referencing the
+    user's images and albums go before the images and albums themselves.
+    """
+    image_ids = select(Image.id).where(Image.owner_id == user_id)
+    album_ids = select(Album.id).where(Album.owner_id == user_id)
+    
+    # Comments on the user's images or written by the user, plus all replies below them
+    comment_ids = select(Comment.id).where(
+        or_(Comment.image_id.in_(image_ids), Comment.user_id == user_id)
+    ).cte("doomed_comments", recursive=True)
+    comment_ids = comment_ids.union(
+        select(Comment.id).where(Comment.parent_id == comment_ids.c.id)
+    )
+    db.query(Comment).filter(
+        Comment.id.in_(select(comment_ids.c.id))
+    ).delete(synchronize_session=False)
+    
+    # Likes the user gave no longer count towards other users' images
+    db.query(Image).filter(
+        Image.id.in_(select(Like.image_id).where(Like.user_id == user_id))
+    ).update({Image.like_count: Image.like_count - 1}, synchronize_session=False)
+    db.query(Like).filter(
+        or_(Like.user_id == user_id, Like.image_id.in_(image_ids))
+    ).delete(synchronize_session=False)
+    db.query(AlbumImage).filter(
+        or_(AlbumImage.album_id.in_(album_ids), AlbumImage.image_id.in_(image_ids))
+    ).delete(synchronize_session=False)
+    db.query(ImageTag).filter(ImageTag.image_id.in_(image_ids)).delete(synchronize_session=False)
+    db.query(Album).filter(Album.owner_id == user_id).delete(synchronize_session=False)
+    db.query(Image).filter(Image.owner_id == user_id).delete(synchronize_session=False)
+    
+    db.query(Follow).filter(
+        or_(Follow.follower_id == user_id, Follow.following_id == user_id)
+    ).delete(synchronize_session=False)
+    db.query(Notification).filter(Notification.user_id == user_id).delete(synchronize_session=False)
+    db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
 
 
 @router.get("/stats")
 def get_platform_stats(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    check_admin_permissions(current_user)
+    # Platform-wide aggregates change slowly, so serve them from cache for a minute
+    cached_stats = cache_service.get("admin_stats")
+    if cached_stats is not None:
+        return cached_stats
+    
+    yesterday = datetime.utcnow() - timedelta(days=1)
     
-    # Get basic counts
-    total_users = db.query(User).count()
-    total_images = db.query(Image).count()
-    total_public_images = db.query(Image).filter(Image.privacy == ImagePrivacy.PUBLIC).count()
-    total_private_images = db.query(Image).filter(Image.privacy == ImagePrivacy.PRIVATE).count()
-    total_unlisted_images = db.query(Image).filter(Image.privacy == ImagePrivacy.UNLISTED).count()
-    total_comments = db.query(Comment).count()
-    total_likes = db.query(Like).count()
+    # Image totals per privacy level plus last-24h uploads in one grouped query
+    image_counts = db.query(
+        Image.privacy,
+        func.count(Image.id),
+        func.count(case((Image.created_at >= yesterday, Image.id))),
+    ).group_by(Image.privacy).all()
+    
+    privacy_counts = {privacy: count for privacy, count, _ in image_counts}
+    total_images = sum(privacy_counts.values())
+    total_public_images = privacy_counts.get(ImagePrivacy.PUBLIC, 0)
+    total_private_images = privacy_counts.get(ImagePrivacy.PRIVATE, 0)
+    total_unlisted_images = privacy_counts.get(ImagePrivacy.UNLISTED, 0)
+    recent_images = sum(recent for _, _, recent in image_counts)
+    
+    # Remaining totals and recent activity as scalar subqueries of a single SELECT
+    (
+        total_users,
+        recent_users,
+        total_comments,
+        recent_comments,
+        total_likes,
+    ) = db.query(
+        select(func.count(User.id)).scalar_subquery(),
+        select(func.count(User.id)).where(User.created_at >= yesterday).scalar_subquery(),
+        select(func.count(Comment.id)).scalar_subquery(),
+        select(func.count(Comment.id)).where(Comment.created_at >= yesterday).scalar_subquery(),
+        select(func.count()).select_from(Like).scalar_subquery(),
+    ).one()
     
     # Get top users by image count
     top_uploaders = db.query(
@@ -51,15 +149,7 @@ def get_platform_stats(
         desc('image_count')
     ).limit(5).all()
     
-    # Get recent activity (last 24 hours)
-    from datetime import datetime, timedelta
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    
-    recent_users = db.query(User).filter(User.created_at >= yesterday).count()
-    recent_images = db.query(Image).filter(Image.created_at >= yesterday).count()
-    recent_comments = db.query(Comment).filter(Comment.created_at >= yesterday).count()
-    
-    return {
+    stats = {
         "total_users": total_users,
         "total_images": total_images,
         "total_public_images": total_public_images,
@@ -77,20 +167,27 @@ def get_platform_stats(
             "new_comments": recent_comments
         }
     }
+    cache_service.set("admin_stats", stats, ttl=60)
+    
+    return stats
 
 
 @router.get("/users", response_model=List[UserSchema])
 def get_all_users(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
     search: str = None,
 ) -> Any:
-    check_admin_permissions(current_user)
-    
-    query = db.query(User)
+    # Load follow relationships up front for the follower/following counts;
+    # any other relationship touched during serialization raises instead of
+    # silently lazy loading per row.
+    query = db.query(User).options(
+        selectinload(User.follower_relationships),
+        selectinload(User.following_relationships),
+        raiseload('*'),
+    )
     
     if search:
         search_term = f"%{search}%"
@@ -101,94 +198,64 @@ def get_all_users(
         )
     
     users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
-    return users
+    return json_response(users_adapter, users)
 
 
 @router.get("/images", response_model=List[ImageSchema])
 def get_all_images(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
     privacy: ImagePrivacy = None,
+    cursor: Optional[str] = None,
 ) -> Any:
-    check_admin_permissions(current_user)
-    
-    query = db.query(Image)
+    """
+    List all images, newest first.
+    
+    Pass the X-Next-Cursor header from the previous response as ``cursor``
+    to page by keyset on (created_at, id) instead of an offset.
+    """
+    query = db.query(Image).options(
+        selectinload(Image.tags).selectinload(ImageTag.tag),
+        raiseload('*'),
+    )
     
     if privacy:
         query = query.filter(Image.privacy == privacy)
     
-    images = query.order_by(Image.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Build response data with proper tag serialization
-    result = []
-    for image in images:
-        # Convert ImageTag objects to tag names
-        tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-        
-        # Create image dict with proper tags
-        image_dict = {
-            "id": image.id,
-            "title": image.title,
-            "description": image.description,
-            "filename": image.filename,
-            "original_filename": image.original_filename,
-            "file_size": image.file_size,
-            "file_type": image.file_type,
-            "width": image.width,
-            "height": image.height,
-            "url": image.url,
-            "thumbnail_url": image.thumbnail_url,
-            "medium_url": image.medium_url,
-            "large_url": image.large_url,
-            "delete_hash": image.delete_hash,
-            "privacy": image.privacy,
-            "views": image.views,
-            "is_nsfw": image.is_nsfw,
-            "owner_id": image.owner_id,
-            "created_at": image.created_at,
-            "updated_at": image.updated_at,
-            "like_count": image.like_count,
-            "tags": tag_names
-        }
-        result.append(image_dict)
+    images = order_newest_first(query, Image, skip, cursor).limit(limit).all()
     
-    return result
+    # Tags are mapped to names by the schema
+    response = json_response(images_adapter, images)
+    if len(images) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(images[-1].created_at, images[-1].id)
+    return response
 
 
-@router.delete("/images/{image_id}")
+@router.delete("/images/{image_id}", status_code=204)
 def admin_delete_image(
     *,
     db: Session = Depends(get_db),
     image_id: int,
-    current_user: User = Depends(get_current_active_user),
-) -> Any:
-    check_admin_permissions(current_user)
-    
+    background_tasks: BackgroundTasks,
+) -> Response:
     image = db.query(Image).filter(Image.id == image_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Delete files from MinIO
-    try:
-        # Delete original image
-        storage_service.delete_file(image.filename)
-        
-        # Delete thumbnails
-        import os
-        base_name = os.path.splitext(image.filename)[0]
-        for size_name in ['small', 'medium', 'large']:
-            storage_service.delete_file(f"{base_name}_{size_name}.jpg")
-    except Exception as e:
-        print(f"Error deleting files from storage: {e}")
-        # Continue with database deletion even if file deletion fails
+    file_names = storage_service.image_file_names(image.filename)
     
     db.delete(image)
     db.commit()
     
-    return {"message": "Image deleted successfully"}
+    # Remove the original and thumbnails from MinIO once the response is sent
+    background_tasks.add_task(delete_storage_files, file_names)
+    
+    invalidate_cache("public_images")
+    invalidate_cache("admin_stats")
+    
+    return Response(status_code=204)
 
 
 @router.put("/users/{user_id}/toggle-active", response_model=UserSchema)
@@ -196,10 +263,8 @@ def toggle_user_active_status(
     *,
     db: Session = Depends(get_db),
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_admin_user),
 ) -> Any:
-    check_admin_permissions(current_user)
-    
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -209,7 +274,7 @@ def toggle_user_active_status(
     
     user.is_active = not user.is_active
     db.commit()
-    db.refresh(user)
+    rate_limiter.invalidate_user_rate_info(user.username)
     
     return user
 
@@ -219,30 +284,25 @@ def toggle_user_verified_status(
     *,
     db: Session = Depends(get_db),
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    check_admin_permissions(current_user)
-    
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.is_verified = not user.is_verified
     db.commit()
-    db.refresh(user)
     
     return user
 
 
-@router.delete("/users/{user_id}")
+@router.delete("/users/{user_id}", status_code=204)
 def delete_user(
     *,
     db: Session = Depends(get_db),
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
-) -> Any:
-    check_admin_permissions(current_user)
-    
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_admin_user),
+) -> Response:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -253,37 +313,31 @@ def delete_user(
     if user.is_superuser:
         raise HTTPException(status_code=400, detail="Cannot delete another superuser")
     
-    # Delete all user's images from MinIO
-    import os
-    for image in user.images:
-        try:
-            # Delete original image
-            storage_service.delete_file(image.filename)
-            
-            # Delete thumbnails
-            base_name = os.path.splitext(image.filename)[0]
-            for size_name in ['small', 'medium', 'large']:
-                storage_service.delete_file(f"{base_name}_{size_name}.jpg")
-        except Exception as e:
-            print(f"Error deleting files for image {image.id}: {e}")
-            # Continue with user deletion even if file deletion fails
-    
-    # Database cascade will handle deleting related records
-    db.delete(user)
+    # Collect the user's image files (original + thumbnails) before the rows go
+    file_names = []
+    for (filename,) in db.query(Image.filename).filter(Image.owner_id == user.id):
+        file_names.extend(storage_service.image_file_names(filename))
+    
+    # Delete the user's rows in bulk rather than through the ORM cascade
+    bulk_delete_user(db, user.id)
     db.commit()
+    rate_limiter.invalidate_user_rate_info(user.username)
+    
+    # Remove the files from MinIO in batches once the response is sent
+    background_tasks.add_task(delete_storage_files, file_names)
+    
+    invalidate_cache("public_images")
+    invalidate_cache("admin_stats")
     
-    return {"message": "User deleted successfully"}
+    return Response(status_code=204)
 
 
 @router.get("/rate-limits")
 def get_rate_limits(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """Get all rate limit configurations"""
-    check_admin_permissions(current_user)
-    
     rate_limits = db.query(RateLimit).order_by(RateLimit.endpoint, RateLimit.tier).all()
     
     # Group by endpoint for better display
@@ -296,7 +350,7 @@ def get_rate_limits(
             "id": limit.id,
             "requests": limit.requests,
             "window": limit.window,
-            "window_text": f"{limit.window // 3600}h" if limit.window >= 3600 else f"{limit.window // 60}m",
+            "window_text": window_text(limit.window),
             "description": limit.description
         }
     
@@ -310,11 +364,8 @@ def update_rate_limit(
     rate_limit_id: int,
     requests: int,
     window: int,
-    current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """Update a specific rate limit configuration"""
-    check_admin_permissions(current_user)
-    
     rate_limit = db.query(RateLimit).filter(RateLimit.id == rate_limit_id).first()
     if not rate_limit:
         raise HTTPException(status_code=404, detail="Rate limit configuration not found")
@@ -324,7 +375,7 @@ def update_rate_limit(
     rate_limit.window = window
     
     db.commit()
-    db.refresh(rate_limit)
+    rate_limiter.reload_configured_limits()
     
     return {
         "id": rate_limit.id,
@@ -332,7 +383,7 @@ def update_rate_limit(
         "tier": rate_limit.tier,
         "requests": rate_limit.requests,
         "window": rate_limit.window,
-        "window_text": f"{rate_limit.window // 3600}h" if rate_limit.window >= 3600 else f"{rate_limit.window // 60}m",
+        "window_text": window_text(rate_limit.window),
         "description": rate_limit.description,
         "updated_at": rate_limit.updated_at
     }
@@ -347,11 +398,8 @@ def create_rate_limit(
     requests: int,
     window: int,
     description: str = None,
-    current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """Create a new rate limit configuration"""
-    check_admin_permissions(current_user)
-    
     # Check if already exists
     existing = db.query(RateLimit).filter(
         RateLimit.endpoint == endpoint,
@@ -372,7 +420,7 @@ def create_rate_limit(
     
     db.add(rate_limit)
     db.commit()
-    db.refresh(rate_limit)
+    rate_limiter.reload_configured_limits()
     
     return {
         "id": rate_limit.id,
@@ -380,7 +428,7 @@ def create_rate_limit(
         "tier": rate_limit.tier,
         "requests": rate_limit.requests,
         "window": rate_limit.window,
-        "window_text": f"{rate_limit.window // 3600}h" if rate_limit.window >= 3600 else f"{rate_limit.window // 60}m",
+        "window_text": window_text(rate_limit.window),
         "description": rate_limit.description,
         "created_at": rate_limit.created_at
     }
@@ -392,13 +440,8 @@ def clear_rate_limits(
     db: Session = Depends(get_db),
     identifier: str = None,
     endpoint: str = None,
-    current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """Clear rate limits from Redis cache"""
-    check_admin_permissions(current_user)
-    
-    from app.services.rate_limiter import rate_limiter
-    
     rate_limiter.clear_limits(identifier=identifier, endpoint=endpoint)
     
     # Get some stats
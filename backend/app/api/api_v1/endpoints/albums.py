@@ -1,16 +1,107 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional, Dict, Tuple
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, select, insert, update, literal, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import uuid
 
 from app.api.deps import get_current_active_user, get_db
 from app.models.user import User
 from app.models.album import Album, AlbumPrivacy, AlbumImage
 from app.models.image import Image
+from app.models.tag import ImageTag
 from app.schemas.album import Album as AlbumSchema, AlbumCreate, AlbumUpdate
+from app.utils.pagination import decode_id_cursor, encode_id_cursor
 
 router = APIRouter()
 
+# Load album images with their tags in batched SELECTs rather than lazily
+# per AlbumImage row; other album relationships raise if touched.
+album_image_options = (
+    selectinload(Album.images).selectinload(AlbumImage.image)
+        .selectinload(Image.tags).selectinload(ImageTag.tag),
+    raiseload('*'),
+)
+
+
+def paginate_albums(query, response: Response, skip: int, limit: int, cursor: Optional[str]) -> List[Album]:
+    """
+    Page an album query by id.
+    
+    With a cursor the page seeks past that album instead of scanning skip
+    rows; the cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    query = query.order_by(Album.id)
+    if cursor:
+        query = query.filter(Album.id > decode_id_cursor(cursor))
+    else:
+        query = query.offset(skip)
+    
+    albums = query.limit(limit).all()
+    if len(albums) == limit:
+        response.headers["X-Next-Cursor"] = encode_id_cursor(albums[-1].id)
+    return albums
+
+
+def get_album_previews(
+    db: Session, albums: List[Album], size: int = 4
+) -> Tuple[Dict[int, int], Dict[int, List[Image]]]:
+    """
+    Fetch image counts and the first few images for a page of albums.
+    
+    Counts come from a GROUP BY and previews from a ROW_NUMBER() window, so
+    only ``size`` images per album are loaded rather than every AlbumImage.
+    """
+    album_ids = [album.id for album in albums]
+    if not album_ids:
+        return {}, {}
+    
+    image_counts = dict(
+        db.query(AlbumImage.album_id, func.count(AlbumImage.image_id))
+        .filter(AlbumImage.album_id.in_(album_ids))
+        .group_by(AlbumImage.album_id)
+    )
+    
+    ranked = select(
+        AlbumImage.album_id,
+        AlbumImage.image_id,
+        func.row_number().over(
+            partition_by=AlbumImage.album_id,
+            order_by=AlbumImage.position
+        ).label("rank")
+    ).where(AlbumImage.album_id.in_(album_ids)).subquery()
+    
+    rows = db.query(ranked.c.album_id, Image).join(
+        Image, Image.id == ranked.c.image_id
+    ).filter(
+        ranked.c.rank <= size
+    ).options(
+        selectinload(Image.tags).selectinload(ImageTag.tag),
+    ).order_by(ranked.c.album_id, ranked.c.rank).all()
+    
+    previews = defaultdict(list)
+    for album_id, image in rows:
+        previews[album_id].append(image)
+    
+    return image_counts, previews
+
+
+def attach_album_previews(db: Session, albums: List[Album]) -> None:
+    """Set preview_images and image_count on a page of albums for the response schema"""
+    image_counts, previews = get_album_previews(db, albums)
+    
+    # Plain attributes read by the response schema; nothing is persisted
+    for album in albums:
+        album.preview_images = previews[album.id]
+        album.image_count = image_counts.get(album.id, 0)
+
+
+def get_album_with_images(db: Session, album_id: int) -> Album:
+    """Fetch an album with its images eager-loaded"""
+    return db.query(Album).options(*album_image_options).filter(Album.id == album_id).first()
+
 
 @router.post("/", response_model=AlbumSchema)
 def create_album(
@@ -28,143 +119,44 @@ def create_album(
         delete_hash=str(uuid.uuid4()),
     )
     db.add(db_album)
-    db.commit()
-    db.refresh(db_album)
+    db.flush()  # assigns db_album.id; committed together with the images below
     
-    # Add images to album
-    for position, image_id in enumerate(album_in.image_ids):
-        image = db.query(Image).filter(
-            Image.id == image_id,
-            Image.owner_id == current_user.id
-        ).first()
-        if image:
-            album_image = AlbumImage(
-                album_id=db_album.id,
-                image_id=image.id,
-                position=position
+    # Add images to album, keeping only those the user owns
+    if album_in.image_ids:
+        owned_ids = {
+            image_id for (image_id,) in db.query(Image.id).filter(
+                Image.id.in_(album_in.image_ids),
+                Image.owner_id == current_user.id
             )
-            db.add(album_image)
-    
-    db.commit()
-    db.refresh(db_album)
-    
-    # Build response without modifying the model
-    images = []
-    for ai in db_album.images:
-        image = ai.image
-        # Convert ImageTag objects to tag names
-        tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-        
-        # Create image dict with proper tags
-        image_dict = {
-            "id": image.id,
-            "title": image.title,
-            "description": image.description,
-            "filename": image.filename,
-            "original_filename": image.original_filename,
-            "file_size": image.file_size,
-            "file_type": image.file_type,
-            "width": image.width,
-            "height": image.height,
-            "url": image.url,
-            "thumbnail_url": image.thumbnail_url,
-            "medium_url": image.medium_url,
-            "large_url": image.large_url,
-            "delete_hash": image.delete_hash,
-            "privacy": image.privacy,
-            "views": image.views,
-            "is_nsfw": image.is_nsfw,
-            "owner_id": image.owner_id,
-            "created_at": image.created_at,
-            "updated_at": image.updated_at,
-            "like_count": image.like_count,
-            "tags": tag_names
         }
-        images.append(image_dict)
-    
-    album_response = {
-        "id": db_album.id,
-        "title": db_album.title,
-        "description": db_album.description,
-        "privacy": db_album.privacy,
-        "cover_image_id": db_album.cover_image_id,
-        "delete_hash": db_album.delete_hash,
-        "views": db_album.views,
-        "owner_id": db_album.owner_id,
-        "created_at": db_album.created_at,
-        "updated_at": db_album.updated_at,
-        "images": images,
-        "image_count": len(images),
-    }
+        rows = [
+            {"album_id": db_album.id, "image_id": image_id, "position": position}
+            for position, image_id in enumerate(album_in.image_ids)
+            if image_id in owned_ids
+        ]
+        if rows:
+            db.execute(insert(AlbumImage), rows)
     
-    return album_response
+    db.commit()
+    return get_album_with_images(db, db_album.id)
 
 
 @router.get("/", response_model=List[AlbumSchema])
 def read_albums(
     *,
     db: Session = Depends(get_db),
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
 ) -> Any:
-    albums = db.query(Album).filter(
+    query = db.query(Album).options(raiseload('*')).filter(
         Album.privacy == AlbumPrivacy.PUBLIC
-    ).offset(skip).limit(limit).all()
-    
-    # Build response data without modifying the model objects
-    album_responses = []
-    for album in albums:
-        # Process preview images with proper tag serialization
-        preview_images = []
-        for ai in album.images[:4]:  # Preview images
-            image = ai.image
-            # Convert ImageTag objects to tag names
-            tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-            
-            # Create image dict with proper tags
-            image_dict = {
-                "id": image.id,
-                "title": image.title,
-                "description": image.description,
-                "filename": image.filename,
-                "original_filename": image.original_filename,
-                "file_size": image.file_size,
-                "file_type": image.file_type,
-                "width": image.width,
-                "height": image.height,
-                "url": image.url,
-                "thumbnail_url": image.thumbnail_url,
-                "medium_url": image.medium_url,
-                "large_url": image.large_url,
-                "delete_hash": image.delete_hash,
-                "privacy": image.privacy,
-                "views": image.views,
-                "is_nsfw": image.is_nsfw,
-                "owner_id": image.owner_id,
-                "created_at": image.created_at,
-                "updated_at": image.updated_at,
-                "like_count": image.like_count,
-                "tags": tag_names
-            }
-            preview_images.append(image_dict)
-        
-        album_data = {
-            "id": album.id,
-            "title": album.title,
-            "description": album.description,
-            "privacy": album.privacy,
-            "cover_image_id": album.cover_image_id,
-            "delete_hash": album.delete_hash,
-            "views": album.views,
-            "owner_id": album.owner_id,
-            "created_at": album.created_at,
-            "updated_at": album.updated_at,
-            "images": preview_images,
-            "image_count": len(album.images),
-        }
-        album_responses.append(album_data)
+    )
+    albums = paginate_albums(query, response, skip, limit, cursor)
+    attach_album_previews(db, albums)
     
-    return album_responses
+    return albums
 
 
 @router.get("/me", response_model=List[AlbumSchema])
@@ -172,67 +164,18 @@ def read_user_albums(
     *,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
 ) -> Any:
-    albums = db.query(Album).filter(
+    query = db.query(Album).options(raiseload('*')).filter(
         Album.owner_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    
-    # Build response data without modifying the model objects
-    album_responses = []
-    for album in albums:
-        # Process preview images with proper tag serialization
-        preview_images = []
-        for ai in album.images[:4]:  # Preview images
-            image = ai.image
-            # Convert ImageTag objects to tag names
-            tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-            
-            # Create image dict with proper tags
-            image_dict = {
-                "id": image.id,
-                "title": image.title,
-                "description": image.description,
-                "filename": image.filename,
-                "original_filename": image.original_filename,
-                "file_size": image.file_size,
-                "file_type": image.file_type,
-                "width": image.width,
-                "height": image.height,
-                "url": image.url,
-                "thumbnail_url": image.thumbnail_url,
-                "medium_url": image.medium_url,
-                "large_url": image.large_url,
-                "delete_hash": image.delete_hash,
-                "privacy": image.privacy,
-                "views": image.views,
-                "is_nsfw": image.is_nsfw,
-                "owner_id": image.owner_id,
-                "created_at": image.created_at,
-                "updated_at": image.updated_at,
-                "like_count": image.like_count,
-                "tags": tag_names
-            }
-            preview_images.append(image_dict)
-        
-        album_data = {
-            "id": album.id,
-            "title": album.title,
-            "description": album.description,
-            "privacy": album.privacy,
-            "cover_image_id": album.cover_image_id,
-            "delete_hash": album.delete_hash,
-            "views": album.views,
-            "owner_id": album.owner_id,
-            "created_at": album.created_at,
-            "updated_at": album.updated_at,
-            "images": preview_images,
-            "image_count": len(album.images),
-        }
-        album_responses.append(album_data)
+    )
+    albums = paginate_albums(query, response, skip, limit, cursor)
+    attach_album_previews(db, albums)
     
-    return album_responses
+    return albums
 
 
 @router.get("/{album_id}", response_model=AlbumSchema)
@@ -241,7 +184,7 @@ def read_album(
     db: Session = Depends(get_db),
     album_id: int,
 ) -> Any:
-    album = db.query(Album).filter(Album.id == album_id).first()
+    album = get_album_with_images(db, album_id)
     if not album:
         raise HTTPException(status_code=404, detail="Album not found")
     
@@ -249,61 +192,17 @@ def read_album(
     if album.privacy == AlbumPrivacy.PRIVATE:
         raise HTTPException(status_code=403, detail="This album is private")
     
-    # Increment views
-    album.views += 1
+    # Increment views atomically so concurrent viewers aren't lost
+    views = db.execute(
+        update(Album)
+        .where(Album.id == album_id)
+        .values(views=Album.views + 1)
+        .returning(Album.views)
+    ).scalar_one()
     db.commit()
-    db.refresh(album)
-    
-    # Build response without modifying the model
-    images = []
-    for ai in album.images:
-        image = ai.image
-        # Convert ImageTag objects to tag names
-        tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-        
-        # Create image dict with proper tags
-        image_dict = {
-            "id": image.id,
-            "title": image.title,
-            "description": image.description,
-            "filename": image.filename,
-            "original_filename": image.original_filename,
-            "file_size": image.file_size,
-            "file_type": image.file_type,
-            "width": image.width,
-            "height": image.height,
-            "url": image.url,
-            "thumbnail_url": image.thumbnail_url,
-            "medium_url": image.medium_url,
-            "large_url": image.large_url,
-            "delete_hash": image.delete_hash,
-            "privacy": image.privacy,
-            "views": image.views,
-            "is_nsfw": image.is_nsfw,
-            "owner_id": image.owner_id,
-            "created_at": image.created_at,
-            "updated_at": image.updated_at,
-            "like_count": image.like_count,
-            "tags": tag_names
-        }
-        images.append(image_dict)
-    
-    album_response = {
-        "id": album.id,
-        "title": album.title,
-        "description": album.description,
-        "privacy": album.privacy,
-        "cover_image_id": album.cover_image_id,
-        "delete_hash": album.delete_hash,
-        "views": album.views,
-        "owner_id": album.owner_id,
-        "created_at": album.created_at,
-        "updated_at": album.updated_at,
-        "images": images,
-        "image_count": len(images),
-    }
+    set_committed_value(album, "views", views)
     
-    return album_response
+    return album
 
 
 @router.put("/{album_id}", response_model=AlbumSchema)
@@ -329,66 +228,17 @@ def update_album(
         album.privacy = album_in.privacy
     if album_in.cover_image_id is not None:
         # Verify the image belongs to the user
-        image = db.query(Image).filter(
-            Image.id == album_in.cover_image_id,
-            Image.owner_id == current_user.id
-        ).first()
-        if image:
+        image_owned = db.query(
+            exists().where(
+                Image.id == album_in.cover_image_id,
+                Image.owner_id == current_user.id
+            )
+        ).scalar()
+        if image_owned:
             album.cover_image_id = album_in.cover_image_id
     
     db.commit()
-    db.refresh(album)
-    
-    # Build response without modifying the model
-    images = []
-    for ai in album.images:
-        image = ai.image
-        # Convert ImageTag objects to tag names
-        tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-        
-        # Create image dict with proper tags
-        image_dict = {
-            "id": image.id,
-            "title": image.title,
-            "description": image.description,
-            "filename": image.filename,
-            "original_filename": image.original_filename,
-            "file_size": image.file_size,
-            "file_type": image.file_type,
-            "width": image.width,
-            "height": image.height,
-            "url": image.url,
-            "thumbnail_url": image.thumbnail_url,
-            "medium_url": image.medium_url,
-            "large_url": image.large_url,
-            "delete_hash": image.delete_hash,
-            "privacy": image.privacy,
-            "views": image.views,
-            "is_nsfw": image.is_nsfw,
-            "owner_id": image.owner_id,
-            "created_at": image.created_at,
-            "updated_at": image.updated_at,
-            "like_count": image.like_count,
-            "tags": tag_names
-        }
-        images.append(image_dict)
-    
-    album_response = {
-        "id": album.id,
-        "title": album.title,
-        "description": album.description,
-        "privacy": album.privacy,
-        "cover_image_id": album.cover_image_id,
-        "delete_hash": album.delete_hash,
-        "views": album.views,
-        "owner_id": album.owner_id,
-        "created_at": album.created_at,
-        "updated_at": album.updated_at,
-        "images": images,
-        "image_count": len(images),
-    }
-    
-    return album_response
+    return get_album_with_images(db, album_id)
 
 
 @router.post("/{album_id}/images/{image_id}")
@@ -399,41 +249,38 @@ def add_image_to_album(
     image_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    album = db.query(Album).filter(
+    # Lock the album row so concurrent appends to it take turns computing the
+    # next position; without it both would read the same max(position)
+    album_owned = db.query(Album.id).filter(
         Album.id == album_id,
         Album.owner_id == current_user.id
-    ).first()
-    if not album:
+    ).with_for_update().first()
+    if not album_owned:
         raise HTTPException(status_code=404, detail="Album not found")
-    
-    image = db.query(Image).filter(
-        Image.id == image_id,
-        Image.owner_id == current_user.id
-    ).first()
-    if not image:
+    image_owned = db.query(
+        exists().where(Image.id == image_id, Image.owner_id == current_user.id)
+    ).scalar()
+    if not image_owned:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Check if image already in album
-    existing = db.query(AlbumImage).filter(
-        AlbumImage.album_id == album_id,
-        AlbumImage.image_id == image_id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Image already in album")
-    
-    # Get next position
-    max_position = db.query(AlbumImage).filter(
-        AlbumImage.album_id == album_id
-    ).count()
-    
-    album_image = AlbumImage(
-        album_id=album_id,
-        image_id=image_id,
-        position=max_position
+    # Append at the end, computing the next position in the same INSERT; the
+    # (album_id, image_id) primary key turns a duplicate add into a no-op
+    next_position = select(
+        literal(album_id),
+        literal(image_id),
+        func.coalesce(func.max(AlbumImage.position), -1) + 1
+    ).where(AlbumImage.album_id == album_id)
+    result = db.execute(
+        pg_insert(AlbumImage)
+        .from_select(["album_id", "image_id", "position"], next_position)
+        .on_conflict_do_nothing(index_elements=["album_id", "image_id"])
     )
-    db.add(album_image)
     db.commit()
     
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Image already in album")
+    
     return {"message": "Image added to album"}
 
 
@@ -445,23 +292,22 @@ def remove_image_from_album(
     image_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    album = db.query(Album).filter(
-        Album.id == album_id,
-        Album.owner_id == current_user.id
-    ).first()
-    if not album:
-        raise HTTPException(status_code=404, detail="Album not found")
-    
-    album_image = db.query(AlbumImage).filter(
+    # Delete only if the album is the user's; work out why only when nothing matched
+    removed = db.query(AlbumImage).filter(
         AlbumImage.album_id == album_id,
-        AlbumImage.image_id == image_id
-    ).first()
-    if not album_image:
-        raise HTTPException(status_code=404, detail="Image not in album")
-    
-    db.delete(album_image)
+        AlbumImage.image_id == image_id,
+        exists().where(Album.id == album_id, Album.owner_id == current_user.id)
+    ).delete(synchronize_session=False)
     db.commit()
     
+    if not removed:
+        album_owned = db.query(
+            exists().where(Album.id == album_id, Album.owner_id == current_user.id)
+        ).scalar()
+        if not album_owned:
+            raise HTTPException(status_code=404, detail="Album not found")
+        raise HTTPException(status_code=404, detail="Image not in album")
+    
     return {"message": "Image removed from album"}
 
 
@@ -1,13 +1,15 @@
 from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import or_, update
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import create_access_token, create_refresh_token, verify_password, get_password_hash, decode_token
+from app.core.security import create_access_token, create_refresh_token, verify_password_async, get_password_hash_async, decode_token, UNUSABLE_PASSWORD
 from app.models.user import User
 from app.schemas.token import Token
 from app.schemas.user import UserCreate, User as UserSchema
@@ -39,33 +41,49 @@ class OAuthURLResponse(BaseModel):
     state: str
 
 
+def get_unique_username(db: Session, username: str) -> str:
+    """Return username, or the first free username_N, using a single query"""
+    taken = {
+        name for (name,) in db.query(User.username).filter(
+            User.username.startswith(username, autoescape=True)
+        )
+    }
+    candidate = username
+    counter = 1
+    while candidate in taken:
+        candidate = f"{username}_{counter}"
+        counter += 1
+    return candidate
+
+
 @router.post("/register", response_model=UserSchema)
-def register(
+async def register(
     *,
     db: Session = Depends(get_db),
     user_in: UserCreate,
     background_tasks: BackgroundTasks,
 ) -> Any:
     # Check if user exists
-    user = db.query(User).filter(User.email == user_in.email).first()
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="A user with this email already exists.",
-        )
-    user = db.query(User).filter(User.username == user_in.username).first()
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="A user with this username already exists.",
-        )
+    def find_conflict() -> str:
+        matches = db.query(User.email, User.username).filter(
+            or_(User.email == user_in.email, User.username == user_in.username)
+        ).all()
+        if any(email == user_in.email for email, _ in matches):
+            return "A user with this email already exists."
+        if matches:
+            return "A user with this username already exists."
+        return ""
+
+    conflict = await run_in_threadpool(find_conflict)
+    if conflict:
+        raise HTTPException(status_code=400, detail=conflict)
     
     # Create new user (not verified by default)
     user = User(
         email=user_in.email,
         username=user_in.username,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
         bio=user_in.bio,
         avatar_url=user_in.avatar_url,
         is_verified=False,  # Require email verification
@@ -74,34 +92,40 @@ def register(
     # Generate verification token
     verification_token = user.generate_email_verification_token()
     
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    def save_user() -> UserSchema:
+        db.add(user)
+        db.commit()
+        return UserSchema.model_validate(user)
+
+    # Serialize inside the threadpool so relationship loads stay off the event loop
+    user_out = await run_in_threadpool(save_user)
     
     # Send verification email in background
     import logging
-    logging.info(f"Adding email task for user {user.email}")
+    logging.info(f"Adding email task for user {user_out.email}")
     background_tasks.add_task(
         email_service.send_verification_email,
-        user.email,
-        user.username,
+        user_out.email,
+        user_out.username,
         verification_token
     )
     
-    return user
+    return user_out
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     # Try to authenticate with username or email
-    user = db.query(User).filter(
-        (User.username == form_data.username) | (User.email == form_data.username)
-    ).first()
+    user = await run_in_threadpool(
+        db.query(User).filter(
+            (User.username == form_data.username) | (User.email == form_data.username)
+        ).first
+    )
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -196,19 +220,29 @@ def verify_email(
     if user.is_verified:
         return {"message": "Email already verified"}
     
-    # Verify the user atomically
-    user.clear_email_verification_token()
-    db.commit()
+    email, username = user.email, user.username
     
-    # Double-check after commit to ensure verification succeeded
-    db.refresh(user)
-    if user.is_verified:
-        # Send welcome email in background (only once after successful verification)
-        background_tasks.add_task(
-            email_service.send_welcome_email,
-            user.email,
-            user.username
+    # Verify the user atomically; only the request that flips the flag gets a row
+    verified = db.execute(
+        update(User)
+        .where(User.id == user.id, User.is_verified.is_not(True))
+        .values(
+            is_verified=True,
+            email_verification_token=None,
+            email_verification_sent_at=None,
         )
+    ).rowcount
+    db.commit()
+    
+    if not verified:
+        return {"message": "Email already verified"}
+    
+    # Send welcome email in background (only once after successful verification)
+    background_tasks.add_task(
+        email_service.send_welcome_email,
+        email,
+        username
+    )
     
     return {"message": "Email verified successfully"}
 
@@ -281,15 +315,15 @@ def forgot_password(
 
 
 @router.post("/reset-password")
-def reset_password(
+async def reset_password(
     *,
     db: Session = Depends(get_db),
     request: PasswordResetConfirm,
 ) -> Any:
     """Reset password with token"""
-    user = db.query(User).filter(
-        User.password_reset_token == request.token
-    ).first()
+    user = await run_in_threadpool(
+        db.query(User).filter(User.password_reset_token == request.token).first
+    )
     
     if not user:
         raise HTTPException(
@@ -304,9 +338,9 @@ def reset_password(
         )
     
     # Update password
-    user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await get_password_hash_async(request.new_password)
     user.clear_password_reset_token()
-    db.commit()
+    await run_in_threadpool(db.commit)
     
     return {"message": "Password reset successfully"}
 
@@ -348,45 +382,44 @@ async def google_callback(
         # Exchange code for user info
         user_info = await oauth_service.exchange_google_code(code)
         
-        # Check if user exists
-        existing_user = db.query(User).filter(
-            (User.google_id == user_info["id"]) | (User.email == user_info["email"])
-        ).first()
+        def get_or_create_user() -> User:
+            # Check if user exists
+            existing_user = db.query(User).filter(
+                (User.google_id == user_info["id"]) | (User.email == user_info["email"])
+            ).first()
         
-        if existing_user:
-            # Link Google account if not already linked
-            if not existing_user.google_id:
-                existing_user.google_id = user_info["id"]
-                db.commit()
+            if existing_user:
+                # Link Google account if not already linked
+                if not existing_user.google_id:
+                    existing_user.google_id = user_info["id"]
+                    db.commit()
             
-            # Verify email if it comes from Google as verified
-            if user_info.get("verified_email") and not existing_user.is_verified:
-                existing_user.is_verified = True
-                db.commit()
+                # Verify email if it comes from Google as verified
+                if user_info.get("verified_email") and not existing_user.is_verified:
+                    existing_user.is_verified = True
+                    db.commit()
+
+                return existing_user
             
-            user = existing_user
-        else:
             # Create new user
             username = user_info.get("email", "").split("@")[0]
             # Ensure username is unique
-            counter = 1
-            original_username = username
-            while db.query(User).filter(User.username == username).first():
-                username = f"{original_username}_{counter}"
-                counter += 1
-            
+            username = get_unique_username(db, username)
+        
             user = User(
                 username=username,
                 email=user_info["email"],
                 full_name=user_info.get("name"),
                 avatar_url=user_info.get("picture"),
                 google_id=user_info["id"],
-                hashed_password=get_password_hash(secrets.token_urlsafe(32)),  # Random password
+                hashed_password=UNUSABLE_PASSWORD,  # OAuth-only until a password is set
                 is_verified=user_info.get("verified_email", False),
             )
             db.add(user)
             db.commit()
-            db.refresh(user)
+            return user
+
+        user = await run_in_threadpool(get_or_create_user)
         
         # Create tokens
         access_token = create_access_token(data={"sub": user.username})
@@ -422,40 +455,39 @@ async def github_callback(
             from fastapi.responses import RedirectResponse
             return RedirectResponse(url=redirect_url)
         
-        # Check if user exists
-        existing_user = db.query(User).filter(
-            (User.github_id == user_info["id"]) | (User.email == user_info["email"])
-        ).first()
+        def get_or_create_user() -> User:
+            # Check if user exists
+            existing_user = db.query(User).filter(
+                (User.github_id == user_info["id"]) | (User.email == user_info["email"])
+            ).first()
         
-        if existing_user:
-            # Link GitHub account if not already linked
-            if not existing_user.github_id:
-                existing_user.github_id = user_info["id"]
-                db.commit()
+            if existing_user:
+                # Link GitHub account if not already linked
+                if not existing_user.github_id:
+                    existing_user.github_id = user_info["id"]
+                    db.commit()
+
+                return existing_user
             
-            user = existing_user
-        else:
             # Create new user
             username = user_info.get("username", user_info.get("email", "").split("@")[0])
             # Ensure username is unique
-            counter = 1
-            original_username = username
-            while db.query(User).filter(User.username == username).first():
-                username = f"{original_username}_{counter}"
-                counter += 1
-            
+            username = get_unique_username(db, username)
+        
             user = User(
                 username=username,
                 email=user_info["email"],
                 full_name=user_info.get("name"),
                 avatar_url=user_info.get("avatar_url"),
                 github_id=user_info["id"],
-                hashed_password=get_password_hash(secrets.token_urlsafe(32)),  # Random password
+                hashed_password=UNUSABLE_PASSWORD,  # OAuth-only until a password is set
                 is_verified=True,  # GitHub emails are considered verified
             )
             db.add(user)
             db.commit()
-            db.refresh(user)
+            return user
+
+        user = await run_in_threadpool(get_or_create_user)
         
         # Create tokens
         access_token = create_access_token(data={"sub": user.username})
@@ -1,8 +1,10 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-import asyncio
-import threading
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, Text, exists, insert, literal, or_, select
+from sqlalchemy.orm import Session, aliased, selectinload, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.api.deps import get_current_active_user, get_db, get_current_user_optional
 from app.models.user import User
@@ -10,40 +12,35 @@ from app.models.image import Image, ImagePrivacy
 from app.models.comment import Comment
 from app.schemas.comment import Comment as CommentSchema, CommentCreate, CommentUpdate
 from app.services.notification_service import NotificationService
-from app.api.api_v1.endpoints.websocket import send_comment_to_room
+from app.api.api_v1.endpoints.websocket import queue_comment_for_room
 
 router = APIRouter()
 
 
 def serialize_comment_for_websocket(comment: Comment) -> dict:
     """Serialize comment for WebSocket transmission"""
-    comment_data = CommentSchema.from_orm(comment).model_dump()
-    # Convert datetime objects to ISO format strings
-    if 'created_at' in comment_data:
-        comment_data['created_at'] = comment_data['created_at'].isoformat()
-    if 'updated_at' in comment_data:
-        comment_data['updated_at'] = comment_data['updated_at'].isoformat()
-    return comment_data
+    # Built straight from the loaded columns: no schema validation per event, and
+    # no replies, so edits don't overwrite the thread clients already have
+    author = comment.author
+    return {
+        "id": comment.id,
+        "content": comment.content,
+        "image_id": comment.image_id,
+        "user_id": comment.user_id,
+        "parent_id": comment.parent_id,
+        "created_at": comment.created_at.isoformat(),
+        "updated_at": comment.updated_at.isoformat() if comment.updated_at else None,
+        "author": {
+            "id": author.id,
+            "username": author.username,
+            "avatar_url": author.avatar_url,
+        },
+    }
 
 
 def broadcast_comment_event(image_id: int, message: dict, exclude_user: int):
-    """Helper function to broadcast comment events in a separate thread"""
-    def run_broadcast():
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(send_comment_to_room(
-                image_id=image_id,
-                message=message,
-                exclude_user=exclude_user
-            ))
-        finally:
-            loop.close()
-    
-    # Run in a separate thread
-    thread = threading.Thread(target=run_broadcast)
-    thread.daemon = True
-    thread.start()
+    """Queue a comment event for the image's room without blocking the request"""
+    queue_comment_for_room(image_id=image_id, message=message, exclude_user=exclude_user)
 
 
 @router.get("/{image_id}/comments", response_model=List[CommentSchema])
@@ -54,7 +51,7 @@ def get_image_comments(
     current_user: User = Depends(get_current_user_optional),
 ) -> Any:
     # Check if image exists and is accessible
-    image = db.query(Image).filter(Image.id == image_id).first()
+    image = db.query(Image.privacy, Image.owner_id).filter(Image.id == image_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
@@ -63,13 +60,23 @@ def get_image_comments(
         if not current_user or image.owner_id != current_user.id:
             raise HTTPException(status_code=403, detail="This image is private")
     
-    # Get top-level comments (no parent) with their replies
-    comments = db.query(Comment).filter(
-        Comment.image_id == image_id,
-        Comment.parent_id.is_(None)
-    ).order_by(Comment.created_at).all()
-    
-    return comments
+    # Load the whole thread at once and assemble replies in memory, so nesting
+    # depth doesn't add queries
+    comments = db.query(Comment).options(
+        selectinload(Comment.author).load_only(User.id, User.username, User.avatar_url),
+        raiseload("*"),
+    ).filter(
+        Comment.image_id == image_id
+    ).order_by(Comment.created_at, Comment.id).all()
+    
+    replies = defaultdict(list)
+    for comment in comments:
+        replies[comment.parent_id].append(comment)
+    for comment in comments:
+        set_committed_value(comment, "replies", replies[comment.id])
+    
+    # Top-level comments (no parent) carry their replies
+    return replies[None]
 
 
 @router.post("/{image_id}/comments", response_model=CommentSchema)
@@ -80,67 +87,82 @@ def create_comment(
     comment_in: CommentCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    # Check if image exists and is accessible
-    image = db.query(Image).filter(Image.id == image_id).first()
-    if not image:
-        raise HTTPException(status_code=404, detail="Image not found")
-    
-    # Check privacy permissions
-    if image.privacy == ImagePrivacy.PRIVATE and image.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Cannot comment on private image")
-    
-    # If replying to a comment, validate parent exists
+    # Insert only when the image is visible to the commenter (and the parent, if any,
+    # belongs to it), returning what the notifications need in the same round-trip
+    parent = aliased(Comment)
+    conditions = [
+        Image.id == image_id,
+        or_(Image.privacy != ImagePrivacy.PRIVATE, Image.owner_id == current_user.id),
+    ]
     if comment_in.parent_id:
-        parent_comment = db.query(Comment).filter(
-            Comment.id == comment_in.parent_id,
-            Comment.image_id == image_id
-        ).first()
-        if not parent_comment:
-            raise HTTPException(status_code=404, detail="Parent comment not found")
-    
-    # Create comment
-    comment = Comment(
-        content=comment_in.content,
-        image_id=image_id,
-        user_id=current_user.id,
-        parent_id=comment_in.parent_id
+        conditions.append(
+            exists().where(parent.id == comment_in.parent_id, parent.image_id == image_id)
+        )
+
+    now = datetime.utcnow()
+    stmt = insert(Comment).from_select(
+        ["content", "image_id", "user_id", "parent_id", "created_at", "updated_at"],
+        select(
+            literal(comment_in.content, Text),
+            Image.id,
+            literal(current_user.id, Integer),
+            literal(comment_in.parent_id, Integer),
+            literal(now, DateTime),
+            literal(now, DateTime),
+        ).where(*conditions)
+    ).returning(
+        Comment,
+        select(Image.owner_id).where(Image.id == image_id).scalar_subquery(),
+        select(Image.title).where(Image.id == image_id).scalar_subquery(),
+        select(parent.user_id).where(parent.id == comment_in.parent_id).scalar_subquery(),
     )
-    
-    db.add(comment)
+    row = db.execute(stmt).first()
+
+    if row is None:
+        # Nothing inserted: work out which check failed
+        db.rollback()
+        image = db.query(Image.privacy, Image.owner_id).filter(Image.id == image_id).first()
+        if not image:
+            raise HTTPException(status_code=404, detail="Image not found")
+        if image.privacy == ImagePrivacy.PRIVATE and image.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Cannot comment on private image")
+        raise HTTPException(status_code=404, detail="Parent comment not found")
+
+    comment, image_owner_id, image_title, parent_author_id = row
     db.commit()
-    db.refresh(comment)
-    
+    # A brand-new comment has no replies; skip the lazy load during serialization
+    set_committed_value(comment, "replies", [])
+
     # Send notifications
     if comment_in.parent_id:
         # This is a reply - notify the parent comment author
-        parent_comment = db.query(Comment).filter(Comment.id == comment_in.parent_id).first()
-        if parent_comment and parent_comment.user_id != current_user.id:
+        if parent_author_id != current_user.id:
             NotificationService.notify_reply(
                 db,
-                parent_comment_author_id=parent_comment.user_id,
+                parent_comment_author_id=parent_author_id,
                 replier=current_user,
-                image_id=image.id,
-                image_title=image.title or "Untitled",
+                image_id=image_id,
+                image_title=image_title or "Untitled",
                 reply_preview=comment.content[:100]  # First 100 chars
             )
     else:
         # This is a top-level comment - notify the image owner
-        if image.owner_id != current_user.id:
+        if image_owner_id != current_user.id:
             NotificationService.notify_comment(
                 db,
-                image_owner_id=image.owner_id,
+                image_owner_id=image_owner_id,
                 commenter=current_user,
-                image_id=image.id,
-                image_title=image.title or "Untitled",
+                image_id=image_id,
+                image_title=image_title or "Untitled",
                 comment_preview=comment.content
             )
     
     # Broadcast comment to WebSocket room
     broadcast_comment_event(
-        image_id=image.id,
+        image_id=image_id,
         message={
             "type": "new_comment",
-            "comment": serialize_comment_for_websocket(comment)
+            "comment": {**serialize_comment_for_websocket(comment), "replies": []}
         },
         exclude_user=current_user.id
     )
@@ -165,7 +187,6 @@ def update_comment(
     
     comment.content = comment_in.content
     db.commit()
-    db.refresh(comment)
     
     # Broadcast comment update to WebSocket room
     print(f"Broadcasting edit comment: user_id={current_user.id}, comment_id={comment.id}, comment_user_id={comment.user_id}")
@@ -3,25 +3,46 @@ Activity feed API endpoints.
 """
 from typing import List, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, desc, func
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, and_, desc, literal, select, union_all
 
 from app.api import deps
 from app.models.user import User
 from app.models.image import Image
 from app.models.follow import Follow
 from app.models.album import Album
-from app.models.like import Like
+from app.models.tag import ImageTag
 from app.schemas.image import Image as ImageSchema
+from app.utils.pagination import encode_cursor, order_newest_first, paginate_newest_first
 
 router = APIRouter()
 
+# The feed schema only needs tag names from relationships (like counts are a
+# column), so load tags in one batched SELECT instead of joining every like
+# and comment row onto the page.
+feed_image_options = (
+    selectinload(Image.tags).selectinload(ImageTag.tag),
+)
+
+# Which half of the mixed feed a row came from
+FOLLOWING, EXPLORE = 1, 2
+
+
+def exclude_followed(query, user_id: int):
+    """Anti-join away images whose owner ``user_id`` already follows."""
+    return query.outerjoin(
+        Follow,
+        and_(Follow.following_id == Image.owner_id, Follow.follower_id == user_id)
+    ).filter(Follow.follower_id.is_(None))
+
 
 @router.get("/", response_model=List[ImageSchema])
 def get_activity_feed(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     days: int = Query(7, ge=1, le=30, description="Number of days to look back"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user)
@@ -30,6 +51,7 @@ def get_activity_feed(
     Get activity feed showing images from users you follow.
     
     Returns recent images from followed users, ordered by upload time.
+    Pass the X-Next-Cursor header as ``cursor`` to page without an offset.
     """
     # Get list of user IDs that current user follows
     following_ids = db.query(Follow.following_id).filter(
@@ -40,18 +62,14 @@ def get_activity_feed(
     date_threshold = datetime.utcnow() - timedelta(days=days)
     
     # Query images from followed users
-    images = db.query(Image).options(
-        joinedload(Image.owner),
-        joinedload(Image.likes),
-        joinedload(Image.comments),
-        joinedload(Image.tags)
-    ).filter(
+    query = db.query(Image).options(*feed_image_options).filter(
         and_(
             Image.owner_id.in_(following_ids),
             Image.privacy == "PUBLIC",
             Image.created_at >= date_threshold
         )
-    ).order_by(desc(Image.created_at)).offset(skip).limit(limit).all()
+    )
+    images = paginate_newest_first(query, Image, response, skip, limit, cursor)
     
     return images
 
@@ -69,32 +87,17 @@ def get_explore_feed(
     Returns trending images based on recent likes and views.
     """
     # Base query for public images
-    query = db.query(Image).options(
-        joinedload(Image.owner),
-        joinedload(Image.likes),
-        joinedload(Image.comments),
-        joinedload(Image.tags)
-    ).filter(Image.privacy == "PUBLIC")
+    query = db.query(Image).options(*feed_image_options).filter(Image.privacy == "PUBLIC")
     
     # If authenticated, exclude images from users already being followed
     if current_user:
-        following_ids = db.query(Follow.following_id).filter(
-            Follow.follower_id == current_user.id
-        ).subquery()
-        
-        query = query.filter(
-            and_(
-                Image.owner_id != current_user.id,  # Not own images
-                Image.owner_id.notin_(following_ids)  # Not from followed users
-            )
-        )
+        query = query.filter(Image.owner_id != current_user.id)  # Not own images
+        query = exclude_followed(query, current_user.id)  # Not from followed users
     
     # Order by popularity (combination of likes and views)
     # This is a simple algorithm - could be improved with time decay
-    images = query.outerjoin(
-        Like, Like.image_id == Image.id
-    ).group_by(Image.id).order_by(
-        desc(func.count(Like.image_id) + Image.views / 10)
+    images = query.order_by(
+        desc(Image.popularity_score), desc(Image.id)
     ).offset(skip).limit(limit).all()
     
     return images
@@ -102,8 +105,10 @@ def get_explore_feed(
 
 @router.get("/mixed", response_model=List[ImageSchema])
 def get_mixed_feed(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     following_ratio: float = Query(0.7, ge=0, le=1, description="Ratio of following vs explore content"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user)
@@ -115,59 +120,51 @@ def get_mixed_feed(
     - 1.0 = 100% from followed users
     - 0.7 = 70% from followed users, 30% explore
     - 0.0 = 100% explore content
+    
+    ``skip``/``cursor`` page through the followed users' images; pass the
+    X-Next-Cursor header as ``cursor`` to page without an offset.
     """
     following_limit = int(limit * following_ratio)
     explore_limit = limit - following_limit
     
-    # Get following feed items
+    # Each half picks its image ids in its own order; one UNION ALL fetches both
     following_ids = db.query(Follow.following_id).filter(
         Follow.follower_id == current_user.id
-    ).subquery()
+    )
     
-    following_images = []
+    halves = []
     if following_limit > 0:
-        following_images = db.query(Image).options(
-            joinedload(Image.owner),
-            joinedload(Image.likes),
-            joinedload(Image.comments),
-            joinedload(Image.tags)
-        ).filter(
+        following_query = db.query(Image.id, literal(FOLLOWING).label("bucket")).filter(
             and_(
                 Image.owner_id.in_(following_ids),
                 Image.privacy == "PUBLIC"
             )
-        ).order_by(desc(Image.created_at)).offset(skip).limit(following_limit).all()
+        )
+        following_query = order_newest_first(following_query, Image, skip, cursor)
+        halves.append(following_query.limit(following_limit).subquery())
     
-    # Get explore feed items
-    explore_images = []
     if explore_limit > 0:
-        explore_query = db.query(Image).options(
-            joinedload(Image.owner),
-            joinedload(Image.likes),
-            joinedload(Image.comments),
-            joinedload(Image.tags)
-        ).filter(
+        # Followed owners are excluded here, so the halves never overlap
+        explore_query = db.query(Image.id, literal(EXPLORE).label("bucket")).filter(
             and_(
                 Image.privacy == "PUBLIC",
-                Image.owner_id != current_user.id,
-                Image.owner_id.notin_(following_ids)
+                Image.owner_id != current_user.id
             )
         )
-        
-        # Avoid duplicates
-        if following_images:
-            existing_ids = [img.id for img in following_images]
-            explore_query = explore_query.filter(Image.id.notin_(existing_ids))
-        
-        # Join with likes to get count and order by popularity
-        explore_images = explore_query.outerjoin(
-            Like, Like.image_id == Image.id
-        ).group_by(Image.id).order_by(
-            desc(func.count(Like.image_id) + Image.views / 10)
-        ).limit(explore_limit).all()
-    
-    # Combine and sort by created_at
-    all_images = following_images + explore_images
-    all_images.sort(key=lambda x: x.created_at, reverse=True)
-    
-    return all_images
\ No newline at end of file
+        explore_query = exclude_followed(explore_query, current_user.id).order_by(
+            desc(Image.popularity_score), desc(Image.id)
+        )
+        halves.append(explore_query.limit(explore_limit).subquery())
+    
+    page = union_all(*(select(half.c.id, half.c.bucket) for half in halves)).subquery()
+    rows = db.query(Image, page.c.bucket).join(page, Image.id == page.c.id).options(
+        *feed_image_options
+    ).order_by(Image.created_at.desc(), Image.id.desc()).all()
+    
+    # The cursor only advances the followed users' half
+    following_images = [image for image, bucket in rows if bucket == FOLLOWING]
+    if following_limit and len(following_images) == following_limit:
+        last = following_images[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    
+    return [image for image, _ in rows]
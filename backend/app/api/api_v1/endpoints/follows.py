@@ -3,22 +3,97 @@ User following/followers API endpoints.
 """
 from typing import List, Optional
 import json
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, func, select, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.api import deps
 from app.models.user import User
 from app.models.follow import Follow
 from app.models.notification import Notification, NotificationType
 from app.services.notification_service import NotificationService
+from app.services.cache import cache_service
 from app.schemas.follow import UserFollowInfo, FollowStats
 from app.schemas.user import User as UserSchema
 from app.schemas.image import Image as ImageSchema
 from app.models.image import Image, ImagePrivacy
+from app.utils.pagination import paginate_newest_first
+from app.api.api_v1.endpoints.images import image_tag_options
 
 router = APIRouter()
 
+# Seconds a user's follow stats are served from cache; follows and
+# unfollows invalidate them sooner
+FOLLOW_STATS_TTL = 30
+
+
+def follow_stats_key(user_id: int) -> str:
+    """Cache key for a user's follow stats"""
+    return f"follow_stats:{user_id}"
+
+
+def invalidate_follow_stats(*user_ids: int):
+    """Drop cached follow stats after a follow relationship changes"""
+    for user_id in user_ids:
+        cache_service.delete(follow_stats_key(user_id))
+
+
+def build_follow_info(
+    db: Session, users: List[User], current_user: Optional[User]
+) -> List[UserFollowInfo]:
+    """
+    Build UserFollowInfo rows for a page of users.
+    
+    Follower/following counts and the current user's follow status come from
+    a few queries over the page's ids instead of per-user relationship loads.
+    """
+    user_ids = [u.id for u in users]
+    if not user_ids:
+        return []
+    
+    followers_counts = dict(
+        db.query(Follow.following_id, func.count())
+        .filter(Follow.following_id.in_(user_ids))
+        .group_by(Follow.following_id)
+    )
+    following_counts = dict(
+        db.query(Follow.follower_id, func.count())
+        .filter(Follow.follower_id.in_(user_ids))
+        .group_by(Follow.follower_id)
+    )
+    
+    following_ids = set()
+    follower_ids = set()
+    if current_user:
+        following_ids = {
+            uid for (uid,) in db.query(Follow.following_id).filter(
+                Follow.follower_id == current_user.id,
+                Follow.following_id.in_(user_ids)
+            )
+        }
+        follower_ids = {
+            uid for (uid,) in db.query(Follow.follower_id).filter(
+                Follow.following_id == current_user.id,
+                Follow.follower_id.in_(user_ids)
+            )
+        }
+    
+    return [
+        UserFollowInfo(
+            id=u.id,
+            username=u.username,
+            full_name=u.full_name,
+            avatar_url=u.avatar_url,
+            bio=u.bio,
+            followers_count=followers_counts.get(u.id, 0),
+            following_count=following_counts.get(u.id, 0),
+            is_following=u.id in following_ids,
+            is_followed_by=u.id in follower_ids,
+        )
+        for u in users
+    ]
+
 
 @router.post("/{user_id}/follow", response_model=dict)
 def follow_user(
@@ -29,14 +104,6 @@ def follow_user(
     """
     Follow a user.
     """
-    # Check if user exists
-    user_to_follow = db.query(User).filter(User.id == user_id).first()
-    if not user_to_follow:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Can't follow yourself
     if user_id == current_user.id:
         raise HTTPException(
@@ -44,36 +111,35 @@ def follow_user(
             detail="You cannot follow yourself"
         )
     
-    # Check if already following
-    existing_follow = db.query(Follow).filter(
-        and_(
-            Follow.follower_id == current_user.id,
-            Follow.following_id == user_id
+    # Check if user exists
+    user_exists = db.query(exists().where(User.id == user_id)).scalar()
+    if not user_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
-    ).first()
     
-    if existing_follow:
+    # Create follow relationship; the (follower_id, following_id) primary key
+    # turns an existing follow into a no-op
+    result = db.execute(
+        pg_insert(Follow)
+        .values(follower_id=current_user.id, following_id=user_id)
+        .on_conflict_do_nothing(index_elements=["follower_id", "following_id"])
+    )
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You are already following this user"
         )
     
-    # Create follow relationship
-    follow = Follow(
-        follower_id=current_user.id,
-        following_id=user_id
-    )
-    db.add(follow)
-    
-    # Commit the follow relationship first
-    db.commit()
-    
-    # Send notification using NotificationService for real-time delivery
+    # Committed together with the follow, so both land in one transaction;
+    # NotificationService also handles real-time delivery
     NotificationService.notify_follow(
         db,
         followed_user_id=user_id,
         follower=current_user
     )
+    invalidate_follow_stats(current_user.id, user_id)
     
     return {"message": "Successfully followed user"}
 
@@ -87,22 +153,22 @@ def unfollow_user(
     """
     Unfollow a user.
     """
-    # Find follow relationship
-    follow = db.query(Follow).filter(
+    # Delete the follow relationship directly; no row means there wasn't one
+    deleted = db.query(Follow).filter(
         and_(
             Follow.follower_id == current_user.id,
             Follow.following_id == user_id
         )
-    ).first()
+    ).delete(synchronize_session=False)
     
-    if not follow:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You are not following this user"
         )
     
-    db.delete(follow)
     db.commit()
+    invalidate_follow_stats(current_user.id, user_id)
     
     return {"message": "Successfully unfollowed user"}
 
@@ -119,8 +185,7 @@ def get_followers(
     Get followers of a user.
     """
     # Check if user exists
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    if not db.query(exists().where(User.id == user_id)).scalar():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -133,26 +198,8 @@ def get_followers(
     
     followers = followers_query.offset(skip).limit(limit).all()
     
-    # Add follow status if authenticated
-    result = []
-    for follower in followers:
-        follower_info = UserFollowInfo(
-            id=follower.id,
-            username=follower.username,
-            full_name=follower.full_name,
-            avatar_url=follower.avatar_url,
-            bio=follower.bio,
-            followers_count=follower.followers_count,
-            following_count=follower.following_count
-        )
-        
-        if current_user:
-            follower_info.is_following = current_user.is_following(follower)
-            follower_info.is_followed_by = current_user.is_followed_by(follower)
-        
-        result.append(follower_info)
-    
-    return result
+    # Add counts, and follow status if authenticated
+    return build_follow_info(db, followers, current_user)
 
 
 @router.get("/{user_id}/following", response_model=List[UserFollowInfo])
@@ -167,8 +214,7 @@ def get_following(
     Get users that a user is following.
     """
     # Check if user exists
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    if not db.query(exists().where(User.id == user_id)).scalar():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -181,26 +227,8 @@ def get_following(
     
     following = following_query.offset(skip).limit(limit).all()
     
-    # Add follow status if authenticated
-    result = []
-    for followed_user in following:
-        user_info = UserFollowInfo(
-            id=followed_user.id,
-            username=followed_user.username,
-            full_name=followed_user.full_name,
-            avatar_url=followed_user.avatar_url,
-            bio=followed_user.bio,
-            followers_count=followed_user.followers_count,
-            following_count=followed_user.following_count
-        )
-        
-        if current_user:
-            user_info.is_following = current_user.is_following(followed_user)
-            user_info.is_followed_by = current_user.is_followed_by(followed_user)
-        
-        result.append(user_info)
-    
-    return result
+    # Add counts, and follow status if authenticated
+    return build_follow_info(db, following, current_user)
 
 
 @router.get("/{user_id}/follow-stats", response_model=FollowStats)
@@ -211,49 +239,54 @@ def get_follow_stats(
     """
     Get follow statistics for a user.
     """
-    # Check if user exists
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    cached = cache_service.get(follow_stats_key(user_id))
+    if cached is not None:
+        return FollowStats(**cached)
+    
+    # Existence and all counts in a single round trip
+    reverse = aliased(Follow)
+    user_exists, followers_count, following_count, mutual_follows_count = db.query(
+        exists().where(User.id == user_id),
+        select(func.count()).where(Follow.following_id == user_id).scalar_subquery(),
+        select(func.count()).where(Follow.follower_id == user_id).scalar_subquery(),
+        # Users who follow each other: user_id -> x with a matching x -> user_id
+        select(func.count()).select_from(Follow).join(
+            reverse,
+            and_(
+                reverse.follower_id == Follow.following_id,
+                reverse.following_id == Follow.follower_id
+            )
+        ).where(Follow.follower_id == user_id).scalar_subquery(),
+    ).one()
+    
+    if not user_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Get counts
-    followers_count = db.query(func.count(Follow.id)).filter(
-        Follow.following_id == user_id
-    ).scalar() or 0
-    
-    following_count = db.query(func.count(Follow.id)).filter(
-        Follow.follower_id == user_id
-    ).scalar() or 0
-    
-    # Get mutual follows (users who follow each other)
-    mutual_query = db.query(func.count(Follow.id)).filter(
-        Follow.follower_id == user_id
-    ).filter(
-        Follow.following_id.in_(
-            db.query(Follow.follower_id).filter(Follow.following_id == user_id)
-        )
-    )
-    mutual_follows_count = mutual_query.scalar() or 0
-    
-    return FollowStats(
+    stats = FollowStats(
         followers_count=followers_count,
         following_count=following_count,
         mutual_follows_count=mutual_follows_count
     )
+    cache_service.set(follow_stats_key(user_id), stats.model_dump(), ttl=FOLLOW_STATS_TTL)
+    return stats
 
 
 @router.get("/activity/feed", response_model=List[ImageSchema])
 def get_activity_feed(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user)
 ):
     """
     Get activity feed showing images from followed users.
+    
+    Pass the X-Next-Cursor header as ``cursor`` to page without an offset.
     """
     # Get IDs of users that current user follows
     following_ids = db.query(Follow.following_id).filter(
@@ -261,7 +294,7 @@ def get_activity_feed(
     ).subquery()
     
     # Get recent images from followed users (plus own images)
-    images = db.query(Image).filter(
+    query = db.query(Image).options(*image_tag_options).filter(
         and_(
             Image.privacy == ImagePrivacy.PUBLIC,
             or_(
@@ -269,41 +302,6 @@ def get_activity_feed(
                 Image.owner_id == current_user.id
             )
         )
-    ).order_by(Image.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Build response data with proper tag serialization
-    result = []
-    for image in images:
-        # Convert ImageTag objects to tag names
-        tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-        
-        # Create image dict with proper tags
-        image_dict = {
-            "id": image.id,
-            "title": image.title,
-            "description": image.description,
-            "filename": image.filename,
-            "original_filename": image.original_filename,
-            "file_size": image.file_size,
-            "file_type": image.file_type,
-            "width": image.width,
-            "height": image.height,
-            "url": image.url,
-            "thumbnail_url": image.thumbnail_url,
-            "medium_url": image.medium_url,
-            "large_url": image.large_url,
-            "delete_hash": image.delete_hash,
-            "privacy": image.privacy,
-            "views": image.views,
-            "is_nsfw": image.is_nsfw,
-            "owner_id": image.owner_id,
-            "created_at": image.created_at,
-            "updated_at": image.updated_at,
-            "like_count": image.like_count,
-            "tags": tag_names
-        }
-        result.append(image_dict)
-    
-    return result
-
-
+    )
+    # Tags come from one batched load; ImageSchema maps them to tag names
+    return paginate_newest_first(query, Image, response, skip, limit, cursor)
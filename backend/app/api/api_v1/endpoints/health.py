@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import redis
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+import os
 import time
 from datetime import datetime
 
@@ -11,6 +12,37 @@ from app.core.config import settings
 
 router = APIRouter()
 
+# One pooled client for all probes; from_url doesn't connect until first use.
+# Short timeouts keep a hung Redis from stalling the health check.
+try:
+    redis_client = redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=0.5,
+        socket_timeout=0.5,
+        health_check_interval=30,
+    )
+except Exception:
+    redis_client = None
+
+UPLOADS_DIR = "/app/uploads"
+# How long a probe of the uploads directory is reused, in seconds
+UPLOADS_CHECK_TTL = 30
+_uploads_check = {"checked_at": None, "exists": False, "writable": False}
+
+
+def get_uploads_status() -> Tuple[bool, bool]:
+    """Return (exists, writable) for the uploads directory, re-probed at most every UPLOADS_CHECK_TTL seconds"""
+    now = time.monotonic()
+    checked_at = _uploads_check["checked_at"]
+    if checked_at is None or now - checked_at >= UPLOADS_CHECK_TTL:
+        exists = os.path.exists(UPLOADS_DIR)
+        _uploads_check.update(
+            checked_at=now,
+            exists=exists,
+            writable=exists and os.access(UPLOADS_DIR, os.W_OK),
+        )
+    return _uploads_check["exists"], _uploads_check["writable"]
+
 
 @router.get("/health")
 def health_check() -> Dict[str, Any]:
@@ -53,9 +85,8 @@ def detailed_health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
     
     # Check Redis connection
     try:
-        if hasattr(settings, 'REDIS_URL'):
+        if redis_client is not None:
             start_time = time.time()
-            redis_client = redis.from_url(settings.REDIS_URL)
             redis_client.ping()
             redis_response_time = (time.time() - start_time) * 1000
             
@@ -76,9 +107,8 @@ def detailed_health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
     
     # Check file system (uploads directory)
     try:
-        import os
-        uploads_dir = "/app/uploads"
-        if os.path.exists(uploads_dir) and os.access(uploads_dir, os.W_OK):
+        _, uploads_writable = get_uploads_status()
+        if uploads_writable:
             health_status["services"]["file_system"] = {
                 "status": "healthy",
                 "uploads_writable": True
@@ -111,8 +141,8 @@ def readiness_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
         db.execute(text("SELECT 1"))
         
         # Check if uploads directory exists
-        import os
-        if not os.path.exists("/app/uploads"):
+        uploads_exists, _ = get_uploads_status()
+        if not uploads_exists:
             raise Exception("Uploads directory not found")
         
         return {
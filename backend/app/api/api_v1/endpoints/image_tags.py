@@ -1,11 +1,13 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_active_user
 from app.models.user import User
 from app.models.tag import Tag, ImageTag
 from app.models.image import Image
+from app.services.cache import invalidate_cache
 from app.schemas.tag import (
     Tag as TagSchema,
     ImageTagAdd
@@ -27,8 +29,8 @@ def add_tags_to_image(
     """
     Add tags to an image. Creates new tags if they don't exist.
     """
-    # Get the image
-    image = db.query(Image).filter(Image.id == image_id).first()
+    # Get the image's owner
+    image = db.query(Image.owner_id).filter(Image.id == image_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
@@ -42,41 +44,45 @@ def add_tags_to_image(
     ).all()
     existing_tag_names = {tag.name for tag in existing_tags}
     
-    # Check tag limit (10 tags per image)
-    if len(existing_tag_names) + len(tag_data.tag_names) > 10:
+    # Skip tags already on this image, and repeats within the request
+    new_names = [
+        name for name in dict.fromkeys(tag_data.tag_names) if name not in existing_tag_names
+    ]
+    
+    # Check tag limit (10 tags per image); re-adding a tag it has doesn't count
+    if len(existing_tag_names) + len(new_names) > 10:
         raise HTTPException(
             status_code=400, 
             detail=f"Image can have maximum 10 tags. Currently has {len(existing_tag_names)} tags."
         )
     
     added_tags = []
-    
-    for tag_name in tag_data.tag_names:
-        # Skip if tag already exists on this image
-        if tag_name in existing_tag_names:
-            continue
-        
-        # Find or create tag
-        tag = db.query(Tag).filter(Tag.name == tag_name).first()
-        if not tag:
-            tag = Tag(name=tag_name)
-            db.add(tag)
+    if new_names:
+        # Find existing tags in one query and create the rest in one INSERT
+        tags_by_name = {
+            tag.name: tag for tag in db.query(Tag).filter(Tag.name.in_(new_names)).all()
+        }
+        created = [Tag(name=name) for name in new_names if name not in tags_by_name]
+        if created:
+            db.add_all(created)
             db.flush()
+            tags_by_name.update((tag.name, tag) for tag in created)
         
-        # Create image-tag association
-        image_tag = ImageTag(image_id=image_id, tag_id=tag.id)
-        db.add(image_tag)
-        
-        added_tags.append(tag)
+        # Create image-tag associations
+        added_tags = [tags_by_name[name] for name in new_names]
+        db.add_all([ImageTag(image_id=image_id, tag_id=tag.id) for tag in added_tags])
     
     db.commit()
+    invalidate_cache("public_images")
     
-    # Return all tags for the image
-    all_tags = db.query(Tag).join(ImageTag).filter(
-        ImageTag.image_id == image_id
-    ).all()
+    if added_tags:
+        # The usage_count trigger ran in the database; re-read the new counts
+        db.query(Tag).filter(
+            Tag.id.in_([tag.id for tag in added_tags])
+        ).populate_existing().all()
     
-    return all_tags
+    # Return all tags for the image
+    return existing_tags + added_tags
 
 
 @router.delete("/{image_id}/tags/{tag_name}")
@@ -90,8 +96,8 @@ def remove_tag_from_image(
     """
     Remove a tag from an image.
     """
-    # Get the image
-    image = db.query(Image).filter(Image.id == image_id).first()
+    # Get the image's owner
+    image = db.query(Image.owner_id).filter(Image.id == image_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
@@ -101,27 +107,27 @@ def remove_tag_from_image(
     
     # Find the tag
     tag_name = tag_name.lower().strip()
-    tag = db.query(Tag).filter(Tag.name == tag_name).first()
-    if not tag:
+    tag_id = db.query(Tag.id).filter(Tag.name == tag_name).scalar()
+    if tag_id is None:
         raise HTTPException(status_code=404, detail="Tag not found")
     
-    # Find and delete the image-tag association
-    image_tag = db.query(ImageTag).filter(
+    # Delete the image-tag association; no row means the image didn't have it
+    deleted = db.query(ImageTag).filter(
         ImageTag.image_id == image_id,
-        ImageTag.tag_id == tag.id
-    ).first()
+        ImageTag.tag_id == tag_id
+    ).delete(synchronize_session=False)
     
-    if not image_tag:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Tag not found on this image")
     
-    db.delete(image_tag)
-    
-    # Check if tag is no longer used (after deleting the image_tag)
-    db.flush()  # Make sure the delete is committed
-    if tag.usage_count == 0:
-        db.delete(tag)
+    # Drop the tag if no image uses it any more, without loading its images
+    db.query(Tag).filter(
+        Tag.id == tag_id,
+        ~exists().where(ImageTag.tag_id == tag_id)
+    ).delete(synchronize_session=False)
     
     db.commit()
+    invalidate_cache("public_images")
     
     return {"message": "Tag removed successfully"}
 
@@ -135,9 +141,8 @@ def get_image_tags(
     """
     Get all tags for an image.
     """
-    # Get the image
-    image = db.query(Image).filter(Image.id == image_id).first()
-    if not image:
+    # Check the image exists
+    if not db.query(exists().where(Image.id == image_id)).scalar():
         raise HTTPException(status_code=404, detail="Image not found")
     
     # Get tags for the image
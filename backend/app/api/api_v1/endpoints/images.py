@@ -1,15 +1,18 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text, and_, or_
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import text, and_, exists, or_
 import os
 import uuid
 from PIL import Image as PILImage
-import io
-from datetime import datetime, timedelta
+import hashlib
+import logging
+from datetime import date, timedelta
 
 from app.api.deps import get_current_active_user, get_db, get_current_user_optional
 from app.core.config import settings
+from app.core.database import SessionLocal
 from app.models.user import User
 from app.models.image import Image, ImagePrivacy
 from app.models.like import Like
@@ -18,52 +21,22 @@ from app.services.image_processing import image_service
 from app.services.cache import cache_result, invalidate_cache
 from app.services.notification_service import NotificationService
 from app.services.storage_service import storage_service
-from app.models.tag import Tag, ImageTag
+from app.services.view_counter import view_counter
+from app.models.tag import ImageTag
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def add_tags_to_images(db: Session, images: List[Image]) -> List[dict]:
-    """Add tags to image objects for API response."""
-    image_dicts = []
-    
-    for image in images:
-        # Get tags for this image
-        tags = db.query(Tag.name).join(ImageTag).filter(
-            ImageTag.image_id == image.id
-        ).all()
-        
-        # Convert image to dict and add tags
-        image_dict = {
-            "id": image.id,
-            "title": image.title,
-            "description": image.description,
-            "filename": image.filename,
-            "original_filename": image.original_filename,
-            "file_size": image.file_size,
-            "file_type": image.file_type,
-            "width": image.width,
-            "height": image.height,
-            "url": image.url,
-            "thumbnail_url": image.thumbnail_url,
-            "medium_url": image.medium_url,
-            "large_url": image.large_url,
-            "delete_hash": image.delete_hash,
-            "privacy": image.privacy,
-            "views": image.views,
-            "is_nsfw": image.is_nsfw,
-            "owner_id": image.owner_id,
-            "created_at": image.created_at,
-            "updated_at": image.updated_at,
-            "like_count": image.like_count,
-            "tags": [tag[0] for tag in tags]
-        }
-        image_dicts.append(image_dict)
-    
-    return image_dicts
+# Image.tags with each tag row, in two batched SELECTs for the whole page;
+# ImageSchema maps them to tag names
+image_tag_options = (
+    selectinload(Image.tags).selectinload(ImageTag.tag),
+)
 
 
-def process_upload_file(upload_file: UploadFile, user_id: int) -> dict:
+def process_upload_file(upload_file: UploadFile, user_id: int, file_size: int) -> dict:
     # Validate file extension
     file_ext = os.path.splitext(upload_file.filename)[1].lower()
     if file_ext not in settings.allowed_extensions_set:
@@ -72,13 +45,12 @@ def process_upload_file(upload_file: UploadFile, user_id: int) -> dict:
     # Generate unique filename
     unique_filename = f"{user_id}_{uuid.uuid4()}{file_ext}"
     
-    # Read file data into memory
-    file_data = upload_file.file.read()
-    upload_file.file.seek(0)  # Reset for potential re-reading
+    # Work from the spooled upload itself rather than a full copy in memory
+    file_obj = upload_file.file
     
-    # Validate the uploaded image
+    # Validate the uploaded image (Pillow only reads the header here)
     try:
-        image = PILImage.open(io.BytesIO(file_data))
+        image = PILImage.open(file_obj)
         # Basic validation
         if image.format not in ['JPEG', 'PNG', 'GIF', 'WEBP']:
             raise HTTPException(status_code=400, detail="Invalid image format")
@@ -91,11 +63,14 @@ def process_upload_file(upload_file: UploadFile, user_id: int) -> dict:
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
+    finally:
+        file_obj.seek(0)
     
-    # Upload to MinIO with thumbnails
+    # Upload the original to MinIO; thumbnails are generated after the response
     try:
-        original_url, small_url, medium_url, large_url = storage_service.upload_image_with_thumbnails(
-            file_data=file_data,
+        original_url = storage_service.upload_original(
+            file_obj=file_obj,
+            file_size=file_size,
             file_name=unique_filename,
             content_type=upload_file.content_type or 'image/jpeg'
         )
@@ -106,24 +81,55 @@ def process_upload_file(upload_file: UploadFile, user_id: int) -> dict:
     result = {
         "filename": unique_filename,
         "original_filename": upload_file.filename,
-        "file_size": len(file_data),
+        "file_size": file_size,
         "file_type": upload_file.content_type,
         "width": metadata.get('width', 0),
         "height": metadata.get('height', 0),
         "url": original_url,
-        "thumbnail_url": small_url or original_url,
-        "medium_url": medium_url or original_url,
-        "large_url": large_url or original_url,
+        # Point at the original until generate_thumbnails replaces these
+        "thumbnail_url": original_url,
+        "medium_url": original_url,
+        "large_url": original_url,
     }
     
     return result
 
 
+def generate_thumbnails(image_id: int, file_name: str) -> None:
+    """Create an uploaded image's thumbnails and store their URLs (runs as a background task)"""
+    try:
+        small_url, medium_url, large_url = storage_service.upload_thumbnails(file_name)
+    except Exception:
+        # The image keeps serving the original at every size
+        logger.exception(f"Error generating thumbnails for image {image_id}")
+        return
+    
+    db = SessionLocal()
+    try:
+        db.query(Image).filter(Image.id == image_id).update({
+            Image.thumbnail_url: small_url or Image.url,
+            Image.medium_url: medium_url or Image.url,
+            Image.large_url: large_url or Image.url,
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    
+    invalidate_cache("public_images")
+
+
+def public_images_cache_key(params: dict) -> str:
+    """Cache key for read_images: every filter and paging parameter, minus the session"""
+    values = sorted((name, value) for name, value in params.items() if name != "db")
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
 @router.post("/", response_model=ImageSchema)
-async def upload_image(
+def upload_image(
     *,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     title: str = Form(None),
     description: str = Form(None),
@@ -139,7 +145,7 @@ async def upload_image(
         raise HTTPException(status_code=400, detail="File too large")
     
     # Process file and get info
-    file_info = process_upload_file(file, current_user.id)
+    file_info = process_upload_file(file, current_user.id, file_size)
     
     # Create database entry
     db_image = Image(
@@ -154,18 +160,21 @@ async def upload_image(
     
     db.add(db_image)
     db.commit()
-    db.refresh(db_image)
+    
+    # Thumbnail encoding is the slow part of an upload; do it after responding
+    background_tasks.add_task(generate_thumbnails, db_image.id, db_image.filename)
     
     # Invalidate public images cache when new image is uploaded
     invalidate_cache("public_images")
+    invalidate_cache("admin_stats")
     
-    # Add empty tags array for new image
-    result = add_tags_to_images(db, [db_image])
-    return result[0] if result else db_image
+    # A new image has no tags yet; skip the lazy load during serialization
+    set_committed_value(db_image, "tags", [])
+    return db_image
 
 
 @router.get("/", response_model=List[ImageSchema])
-@cache_result(ttl=300, key_prefix="public_images")  # Cache for 5 minutes
+@cache_result(ttl=300, key_prefix="public_images", key_builder=public_images_cache_key)
 def read_images(
     *,
     db: Session = Depends(get_db),
@@ -180,8 +189,8 @@ def read_images(
     max_views: Optional[int] = Query(None, description="Maximum number of views"),
     min_likes: Optional[int] = Query(None, description="Minimum number of likes"),
     max_likes: Optional[int] = Query(None, description="Maximum number of likes"),
-    date_from: Optional[str] = Query(None, description="Filter images from this date (YYYY-MM-DD)"),
-    date_to: Optional[str] = Query(None, description="Filter images to this date (YYYY-MM-DD)"),
+    date_from: Optional[date] = Query(None, description="Filter images from this date (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Filter images to this date (YYYY-MM-DD)"),
     min_width: Optional[int] = Query(None, description="Minimum image width"),
     min_height: Optional[int] = Query(None, description="Minimum image height"),
     aspect_ratio: Optional[str] = Query(None, description="Aspect ratio filter (square, landscape, portrait)"),
@@ -192,7 +201,7 @@ def read_images(
     Supports full-text search, filtering by various image properties,
     and multiple sorting options.
     """
-    query = db.query(Image).filter(Image.privacy == ImagePrivacy.PUBLIC)
+    query = db.query(Image).options(*image_tag_options).filter(Image.privacy == ImagePrivacy.PUBLIC)
     
     # Full-text search using PostgreSQL's GIN index
     if search:
@@ -217,37 +226,19 @@ def read_images(
     if max_views is not None:
         query = query.filter(Image.views <= max_views)
     
-    # Likes filter (using subquery for like_count)
-    if min_likes is not None or max_likes is not None:
-        from app.models.like import Like
-        like_count_subquery = (
-            db.query(Like.image_id, db.func.count(Like.id).label('like_count'))
-            .group_by(Like.image_id)
-            .subquery()
-        )
-        query = query.outerjoin(like_count_subquery, Image.id == like_count_subquery.c.image_id)
-        
-        if min_likes is not None:
-            query = query.filter(db.func.coalesce(like_count_subquery.c.like_count, 0) >= min_likes)
-        if max_likes is not None:
-            query = query.filter(db.func.coalesce(like_count_subquery.c.like_count, 0) <= max_likes)
+    # Likes filter
+    if min_likes is not None:
+        query = query.filter(Image.like_count >= min_likes)
+    if max_likes is not None:
+        query = query.filter(Image.like_count <= max_likes)
     
     # Date filters
     if date_from:
-        try:
-            date_from_parsed = datetime.strptime(date_from, "%Y-%m-%d")
-            query = query.filter(Image.created_at >= date_from_parsed)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date_from format. Use YYYY-MM-DD")
+        query = query.filter(Image.created_at >= date_from)
     
     if date_to:
-        try:
-            date_to_parsed = datetime.strptime(date_to, "%Y-%m-%d")
-            # Add 1 day to include the entire day
-            date_to_end = date_to_parsed + timedelta(days=1)
-            query = query.filter(Image.created_at < date_to_end)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date_to format. Use YYYY-MM-DD")
+        # Add 1 day to include the entire day
+        query = query.filter(Image.created_at < date_to + timedelta(days=1))
     
     # Dimension filters
     if min_width is not None:
@@ -258,14 +249,13 @@ def read_images(
     # Aspect ratio filter
     if aspect_ratio:
         if aspect_ratio == "square":
-            # Square images (aspect ratio between 0.9 and 1.1)
+            # Square images (aspect ratio between 0.9 and 1.1), compared by
+            # cross-multiplying so it stays in integers with no division
             query = query.filter(
                 and_(
-                    Image.width.isnot(None),
-                    Image.height.isnot(None),
                     Image.height > 0,
-                    (Image.width.cast(db.Float) / Image.height.cast(db.Float)) >= 0.9,
-                    (Image.width.cast(db.Float) / Image.height.cast(db.Float)) <= 1.1
+                    Image.width * 10 >= Image.height * 9,
+                    Image.width * 10 <= Image.height * 11
                 )
             )
         elif aspect_ratio == "landscape":
@@ -294,18 +284,10 @@ def read_images(
         else:
             query = query.order_by(Image.views.desc())
     elif sort_by == "like_count":
-        # Sort by like count using subquery
-        from app.models.like import Like
-        like_count_subquery = (
-            db.query(Like.image_id, db.func.count(Like.id).label('like_count'))
-            .group_by(Like.image_id)
-            .subquery()
-        )
-        query = query.outerjoin(like_count_subquery, Image.id == like_count_subquery.c.image_id)
         if order == "asc":
-            query = query.order_by(db.func.coalesce(like_count_subquery.c.like_count, 0).asc())
+            query = query.order_by(Image.like_count.asc())
         else:
-            query = query.order_by(db.func.coalesce(like_count_subquery.c.like_count, 0).desc())
+            query = query.order_by(Image.like_count.desc())
     elif sort_by == "created_at":
         if order == "asc":
             query = query.order_by(Image.created_at.asc())
@@ -318,8 +300,8 @@ def read_images(
     # Apply pagination
     images = query.offset(skip).limit(limit).all()
     
-    # Add tags to images
-    return add_tags_to_images(db, images)
+    # Serialized before caching so cached entries hold plain data, not ORM rows
+    return [ImageSchema.model_validate(image) for image in images]
 
 
 @router.get("/me", response_model=List[ImageSchema])
@@ -330,12 +312,11 @@ def read_user_images(
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
-    images = db.query(Image).filter(
+    images = db.query(Image).options(*image_tag_options).filter(
         Image.owner_id == current_user.id
     ).offset(skip).limit(limit).all()
     
-    # Add tags to images
-    return add_tags_to_images(db, images)
+    return images
 
 
 @router.get("/{image_id}", response_model=ImageSchema)
@@ -345,7 +326,7 @@ def read_image(
     image_id: int,
     current_user: Optional[User] = Depends(get_current_user_optional),
 ) -> Any:
-    image = db.query(Image).filter(Image.id == image_id).first()
+    image = db.query(Image).options(*image_tag_options).filter(Image.id == image_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
@@ -354,14 +335,19 @@ def read_image(
         if not current_user or image.owner_id != current_user.id:
             raise HTTPException(status_code=403, detail="This image is private")
     
-    # Increment views (only for non-owners to avoid inflating view counts)
+    # Count the view (only for non-owners to avoid inflating view counts);
+    # views are normally buffered and written in batches
     if not current_user or current_user.id != image.owner_id:
-        image.views += 1
-        db.commit()
+        if not view_counter.add(image.id):
+            image.views += 1
+            db.commit()
+    
+    # Include views buffered but not yet written
+    pending = view_counter.pending_views(image.id)
+    if pending:
+        set_committed_value(image, "views", (image.views or 0) + pending)
     
-    # Add tags to image
-    result = add_tags_to_images(db, [image])
-    return result[0] if result else image
+    return image
 
 
 @router.put("/{image_id}", response_model=ImageSchema)
@@ -372,7 +358,7 @@ def update_image(
     image_in: ImageUpdate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    image = db.query(Image).filter(Image.id == image_id).first()
+    image = db.query(Image).options(*image_tag_options).filter(Image.id == image_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
@@ -389,11 +375,10 @@ def update_image(
         image.is_nsfw = image_in.is_nsfw
     
     db.commit()
-    db.refresh(image)
     
-    # Add tags to image
-    result = add_tags_to_images(db, [image])
-    return result[0] if result else image
+    invalidate_cache("public_images")
+    
+    return image
 
 
 @router.delete("/{image_id}")
@@ -410,15 +395,9 @@ def delete_image(
     if image.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    # Delete files from MinIO
+    # Delete original and thumbnails from MinIO in a single request
     try:
-        # Delete original image
-        storage_service.delete_file(image.filename)
-        
-        # Delete thumbnails
-        base_name = os.path.splitext(image.filename)[0]
-        for size_name in ['small', 'medium', 'large']:
-            storage_service.delete_file(f"{base_name}_{size_name}.jpg")
+        storage_service.delete_files(storage_service.image_file_names(image.filename))
     except Exception as e:
         print(f"Error deleting files from storage: {e}")
         # Continue with database deletion even if file deletion fails
@@ -426,6 +405,9 @@ def delete_image(
     db.delete(image)
     db.commit()
     
+    invalidate_cache("public_images")
+    invalidate_cache("admin_stats")
+    
     return {"message": "Image deleted successfully"}
 
 
@@ -446,19 +428,23 @@ def like_image(
         raise HTTPException(status_code=403, detail="This image is private")
     
     # Check if already liked
-    existing_like = db.query(Like).filter(
-        Like.user_id == current_user.id,
-        Like.image_id == image_id
-    ).first()
+    already_liked = db.query(
+        exists().where(Like.user_id == current_user.id, Like.image_id == image_id)
+    ).scalar()
     
-    if existing_like:
+    if already_liked:
         raise HTTPException(status_code=400, detail="Image already liked")
     
     # Create like
     like = Like(user_id=current_user.id, image_id=image_id)
     db.add(like)
+    db.query(Image).filter(Image.id == image_id).update(
+        {Image.like_count: Image.like_count + 1}, synchronize_session=False
+    )
     db.commit()
     
+    invalidate_cache("public_images")
+    
     # Send notification to image owner if it's not the liker
     if image.owner_id != current_user.id:
         NotificationService.notify_like(
@@ -495,8 +481,13 @@ def unlike_image(
     
     # Remove like
     db.delete(like)
+    db.query(Image).filter(Image.id == image_id).update(
+        {Image.like_count: Image.like_count - 1}, synchronize_session=False
+    )
     db.commit()
     
+    invalidate_cache("public_images")
+    
     return {"message": "Image unliked successfully"}
 
 
@@ -507,16 +498,15 @@ def check_if_liked(
     image_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    like = db.query(Like).filter(
-        Like.user_id == current_user.id,
-        Like.image_id == image_id
-    ).first()
+    liked = db.query(
+        exists().where(Like.user_id == current_user.id, Like.image_id == image_id)
+    ).scalar()
     
-    return {"liked": like is not None}
+    return {"liked": liked}
 
 
 @router.get("/file/{file_name}")
-async def serve_file(
+def serve_file(
     file_name: str,
     db: Session = Depends(get_db),
 ) -> Any:
@@ -42,10 +42,7 @@ def get_unread_count(
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """Get count of unread notifications"""
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.read == False
-    ).count()
+    count = NotificationService.get_unread_count(db, current_user.id)
     
     return {"unread_count": count}
 
@@ -103,6 +100,8 @@ def delete_notification(
     
     db.delete(notification)
     db.commit()
+    if not notification.read:
+        NotificationService.invalidate_unread_count(current_user.id)
     
     return {"message": "Notification deleted successfully"}
 
@@ -140,5 +139,6 @@ def delete_all_notifications(
     ).delete()
     
     db.commit()
+    NotificationService.invalidate_unread_count(current_user.id)
     
     return {"message": f"{count} notifications deleted"}
\ No newline at end of file
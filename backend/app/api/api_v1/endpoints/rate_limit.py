@@ -2,7 +2,8 @@
 Rate limiting API endpoints.
 """
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, Depends, Request
+import json
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
@@ -11,6 +12,46 @@ from app.services.rate_limiter import rate_limiter
 
 router = APIRouter()
 
+# Static, so it is serialized once at import rather than on every request
+RATE_LIMIT_TIERS = {
+    "tiers": {
+        "anonymous": {
+            "name": "Anonymous",
+            "description": "Default tier for unauthenticated users",
+            "limits": {
+                "images_per_hour": 10,
+                "api_calls_per_hour": 100,
+                "login_attempts_per_5min": 5
+            }
+        },
+        "standard": {
+            "name": "Standard",
+            "description": "Default tier for authenticated users",
+            "limits": {
+                "images_per_hour": 100,
+                "api_calls_per_hour": 1000,
+                "login_attempts_per_5min": 10
+            }
+        },
+        "premium": {
+            "name": "Premium",
+            "description": "Enhanced tier for premium users",
+            "limits": {
+                "images_per_hour": 1000,
+                "api_calls_per_hour": 10000,
+                "login_attempts_per_5min": 20
+            },
+            "features": [
+                "10x higher rate limits",
+                "Priority API access",
+                "Advanced analytics"
+            ]
+        }
+    }
+}
+
+RATE_LIMIT_TIERS_JSON = json.dumps(RATE_LIMIT_TIERS)
+
 
 @router.get("/status", response_model=Dict[str, Any])
 def get_rate_limit_status(
@@ -23,7 +64,7 @@ def get_rate_limit_status(
     # Get identifier
     if current_user:
         identifier = f"user:{current_user.id}"
-        user_tier = rate_limiter._get_user_tier(current_user.id)
+        user_tier = current_user.effective_tier
     else:
         client_ip = request.client.host if request.client else "unknown"
         identifier = f"ip:{client_ip}"
@@ -69,39 +110,4 @@ def get_rate_limit_tiers():
     """
     Get information about available rate limit tiers.
     """
-    return {
-        "tiers": {
-            "anonymous": {
-                "name": "Anonymous",
-                "description": "Default tier for unauthenticated users",
-                "limits": {
-                    "images_per_hour": 10,
-                    "api_calls_per_hour": 100,
-                    "login_attempts_per_5min": 5
-                }
-            },
-            "standard": {
-                "name": "Standard",
-                "description": "Default tier for authenticated users",
-                "limits": {
-                    "images_per_hour": 100,
-                    "api_calls_per_hour": 1000,
-                    "login_attempts_per_5min": 10
-                }
-            },
-            "premium": {
-                "name": "Premium",
-                "description": "Enhanced tier for premium users",
-                "limits": {
-                    "images_per_hour": 1000,
-                    "api_calls_per_hour": 10000,
-                    "login_attempts_per_5min": 20
-                },
-                "features": [
-                    "10x higher rate limits",
-                    "Priority API access",
-                    "Advanced analytics"
-                ]
-            }
-        }
-    }
\ No newline at end of file
+    return Response(content=RATE_LIMIT_TIERS_JSON, media_type="application/json")
@@ -20,48 +20,29 @@ def get_search_suggestions(
     
     Returns a list of suggested search terms that match the query.
     """
-    # Simple ILIKE search that works without extensions
+    # One pass over the matching public images (the title/description trigram
+    # indexes find them), unnesting each row's full title, full description
+    # and their words as candidates. A word can only match if its title or
+    # description does, so this returns what four separate scans would.
     suggestions_query = text("""
-        WITH all_suggestions AS (
-            SELECT DISTINCT suggestion, 
+        SELECT suggestion
+        FROM (
+            SELECT DISTINCT s.suggestion,
                    CASE 
-                       WHEN suggestion ILIKE :starts_with THEN 1 
+                       WHEN s.suggestion ILIKE :starts_with THEN 1 
                        ELSE 2 
                    END as priority
-            FROM (
-                SELECT title as suggestion FROM images 
-                WHERE title IS NOT NULL 
-                AND privacy = 'PUBLIC' 
-                AND title ILIKE :pattern
-                AND char_length(title) > 2
-                
-                UNION
-                
-                SELECT description as suggestion FROM images 
-                WHERE description IS NOT NULL 
-                AND privacy = 'PUBLIC' 
-                AND description ILIKE :pattern
-                AND char_length(description) > 2
-                
-                UNION
-                
-                SELECT unnest(string_to_array(title, ' ')) as suggestion FROM images 
-                WHERE title IS NOT NULL 
-                AND privacy = 'PUBLIC' 
-                AND title ILIKE :pattern
-                
-                UNION
-                
-                SELECT unnest(string_to_array(description, ' ')) as suggestion FROM images 
-                WHERE description IS NOT NULL 
-                AND privacy = 'PUBLIC' 
-                AND description ILIKE :pattern
-            ) t
-            WHERE char_length(suggestion) > 2
-            AND suggestion ILIKE :pattern
-        )
-        SELECT suggestion
-        FROM all_suggestions
+            FROM images i
+            CROSS JOIN LATERAL unnest(
+                ARRAY[i.title::text, i.description]
+                || string_to_array(i.title, ' ')
+                || string_to_array(i.description, ' ')
+            ) AS s(suggestion)
+            WHERE i.privacy = 'PUBLIC'
+            AND (i.title ILIKE :pattern OR i.description ILIKE :pattern)
+            AND char_length(s.suggestion) > 2
+            AND s.suggestion ILIKE :pattern
+        ) t
         ORDER BY priority, char_length(suggestion), suggestion
         LIMIT :limit
     """)
@@ -92,24 +73,11 @@ def get_popular_search_terms(
     
     Returns a list of popular search terms from public images.
     """
+    # Read from the popular_terms materialized view, which the app refreshes
+    # every few minutes (app/services/popular_terms.py)
     popular_terms_query = text("""
-        SELECT word, count(*) as frequency
-        FROM (
-            SELECT unnest(string_to_array(lower(title), ' ')) as word 
-            FROM images 
-            WHERE title IS NOT NULL 
-            AND privacy = 'PUBLIC'
-            
-            UNION ALL
-            
-            SELECT unnest(string_to_array(lower(description), ' ')) as word 
-            FROM images 
-            WHERE description IS NOT NULL 
-            AND privacy = 'PUBLIC'
-        ) t
-        WHERE char_length(word) > 2
-        AND word NOT IN ('the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'man', 'men', 'put', 'say', 'she', 'too', 'use')
-        GROUP BY word
+        SELECT word
+        FROM popular_terms
         ORDER BY frequency DESC, word
         LIMIT :limit
     """)
@@ -120,4 +88,4 @@ def get_popular_search_terms(
         return popular_terms
     except Exception as e:
         print(f"Error in popular terms: {e}")
-        return []
\ No newline at end of file
+        return []
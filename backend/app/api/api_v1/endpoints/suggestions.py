@@ -4,15 +4,19 @@ User suggestions API endpoints.
 from typing import List
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import func, literal, select, union_all
 
 from app.api import deps
 from app.models.user import User
 from app.models.follow import Follow
 from app.schemas.follow import UserFollowInfo
+from app.api.api_v1.endpoints.follows import build_follow_info
 
 router = APIRouter()
 
+# Suggestion sources, in the order they fill the list
+FRIENDS_OF_FRIENDS, POPULAR = 1, 2
+
 
 @router.get("/", response_model=List[UserFollowInfo])
 def get_user_suggestions(
@@ -26,66 +30,45 @@ def get_user_suggestions(
     2. Users with similar interests (based on image tags)
     3. Popular users you don't follow
     """
-    # Get users that current user is already following
-    following_ids = db.query(Follow.following_id).filter(
-        Follow.follower_id == current_user.id
-    ).subquery()
+    # Users the current user already follows
+    following_ids = select(Follow.following_id).where(Follow.follower_id == current_user.id)
     
-    # Strategy 1: Users followed by people you follow (friends of friends)
-    friends_of_friends = db.query(
-        User,
-        func.count(Follow.following_id).label('mutual_connections')
-    ).join(
-        Follow, Follow.following_id == User.id
-    ).filter(
-        and_(
-            Follow.follower_id.in_(following_ids),  # Followed by someone you follow
-            User.id != current_user.id,  # Not yourself
-            User.id.notin_(following_ids)  # Not already following
-        )
-    ).group_by(User.id).order_by(func.count(Follow.following_id).desc())
+    # Users followed by someone you follow
+    followed_by_following = select(Follow.following_id).where(Follow.follower_id.in_(following_ids))
     
-    suggestions = friends_of_friends.limit(limit).all()
+    # Strategy 1: Users followed by people you follow (friends of friends),
+    # ranked by how many of them follow each one
+    friends_of_friends = select(
+        Follow.following_id.label("user_id"),
+        func.count().label("score"),
+        literal(FRIENDS_OF_FRIENDS).label("bucket"),
+    ).where(
+        Follow.follower_id.in_(following_ids),
+        Follow.following_id != current_user.id,
+        Follow.following_id.notin_(following_ids),
+    ).group_by(Follow.following_id)
     
-    # If we need more suggestions, add popular users
-    if len(suggestions) < limit:
-        popular_users = db.query(
-            User,
-            func.count(Follow.follower_id).label('follower_count')
-        ).outerjoin(
-            Follow, Follow.following_id == User.id
-        ).filter(
-            and_(
-                User.id != current_user.id,
-                User.id.notin_(following_ids),
-                User.id.notin_([s[0].id for s in suggestions])  # Not already in suggestions
-            )
-        ).group_by(User.id).order_by(
-            func.count(Follow.follower_id).desc()
-        ).limit(limit - len(suggestions)).all()
-        
-        suggestions.extend(popular_users)
+    # Strategy 2: Popular users to fill the rest, skipping the ones above
+    popular_users = select(
+        User.id.label("user_id"),
+        func.count(Follow.follower_id).label("score"),
+        literal(POPULAR).label("bucket"),
+    ).outerjoin(
+        Follow, Follow.following_id == User.id
+    ).where(
+        User.id != current_user.id,
+        User.id.notin_(following_ids),
+        User.id.notin_(followed_by_following),
+    ).group_by(User.id)
     
-    # Format results
-    result = []
-    for user_data in suggestions:
-        user = user_data[0] if isinstance(user_data, tuple) else user_data
-        
-        # Check if user has required attributes
-        if not hasattr(user, 'id'):
-            continue
-            
-        user_info = UserFollowInfo(
-            id=user.id,
-            username=user.username,
-            full_name=user.full_name,
-            avatar_url=user.avatar_url,
-            bio=user.bio,
-            followers_count=user.followers_count,
-            following_count=user.following_count,
-            is_following=False,  # We already filtered out users being followed
-            is_followed_by=user.is_followed_by(current_user)
-        )
-        result.append(user_info)
+    # Both strategies in one round-trip: friends of friends first, then popular
+    candidates = union_all(friends_of_friends, popular_users).subquery()
+    suggestions = db.query(User).join(
+        candidates, candidates.c.user_id == User.id
+    ).order_by(
+        candidates.c.bucket, candidates.c.score.desc(), User.id
+    ).limit(limit).all()
     
-    return result
\ No newline at end of file
+    # Follow counts and follow-back status for the whole page in a few batched
+    # queries rather than relationship loads per suggested user
+    return build_follow_info(db, suggestions, current_user)
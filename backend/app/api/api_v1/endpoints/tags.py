@@ -1,12 +1,16 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import desc
 
 from app.api.deps import get_db, get_current_user, get_current_active_user
 from app.models.user import User
 from app.models.tag import Tag, ImageTag
 from app.models.image import Image
+from app.schemas.image import Image as ImageSchema
+from app.utils.pagination import count_query
+from app.services.cache import cache_service
+from app.api.api_v1.endpoints.images import image_tag_options
 from app.schemas.tag import (
     Tag as TagSchema,
     TagCreate,
@@ -18,7 +22,10 @@ from app.schemas.tag import (
 
 router = APIRouter()
 
-
+# Seconds popular tags and tag search results are cached; both are
+# aggregates where a short lag isn't noticeable, so they just expire
+POPULAR_TAGS_TTL = 300
+TAG_SEARCH_TTL = 60
 
 
 @router.get("/popular", response_model=List[PopularTag])
@@ -30,27 +37,21 @@ def get_popular_tags(
     """
     Get most popular tags by usage count.
     """
-    # Query tags with usage count using a subquery
-    tag_usage = db.query(
-        Tag.id,
-        Tag.name,
-        func.count(ImageTag.image_id).label('usage_count')
-    ).outerjoin(ImageTag).group_by(Tag.id, Tag.name).subquery()
+    cache_key = f"popular_tags:{limit}"
+    cached = cache_service.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Get tags with usage > 0, ordered by usage count
-    popular_tags = db.query(
-        tag_usage.c.id,
-        tag_usage.c.name,
-        tag_usage.c.usage_count
-    ).filter(
-        tag_usage.c.usage_count > 0
+    # Get tags in use, ordered by their stored usage count
+    popular_tags = db.query(Tag.id, Tag.name, Tag.usage_count).filter(
+        Tag.usage_count > 0
     ).order_by(
-        desc(tag_usage.c.usage_count),
-        tag_usage.c.name
+        desc(Tag.usage_count),
+        Tag.name
     ).limit(limit).all()
     
     # Convert to response format
-    return [
+    result = [
         {
             "id": tag.id,
             "name": tag.name,
@@ -58,6 +59,8 @@ def get_popular_tags(
         }
         for tag in popular_tags
     ]
+    cache_service.set(cache_key, result, ttl=POPULAR_TAGS_TTL)
+    return result
 
 
 @router.get("/search", response_model=List[TagSchema])
@@ -72,21 +75,22 @@ def search_tags(
     """
     q = q.lower().strip()
     
-    # Use a subquery to count usage and order by it
-    usage_count_subquery = (
-        db.query(func.count(ImageTag.tag_id))
-        .filter(ImageTag.tag_id == Tag.id)
-        .scalar_subquery()
-    )
+    cache_key = f"tag_search:{limit}:{q}"
+    cached = cache_service.get(cache_key)
+    if cached is not None:
+        return cached
     
     tags = db.query(Tag).filter(
         Tag.name.ilike(f"%{q}%")
     ).order_by(
-        desc(usage_count_subquery),
+        desc(Tag.usage_count),
         Tag.name
     ).limit(limit).all()
     
-    return tags
+    # Cached as plain JSON-ready dicts rather than ORM rows
+    result = [TagSchema.model_validate(tag).model_dump(mode="json") for tag in tags]
+    cache_service.set(cache_key, result, ttl=TAG_SEARCH_TTL)
+    return result
 
 
 @router.get("/by-name/{tag_name}/images", response_model=dict)
@@ -106,22 +110,21 @@ def get_images_by_tag(
         raise HTTPException(status_code=404, detail="Tag not found")
     
     # Query for public images with this tag
-    query = db.query(Image).join(ImageTag).filter(
+    query = db.query(Image).options(*image_tag_options).join(ImageTag).filter(
         ImageTag.tag_id == tag.id,
         Image.privacy == "PUBLIC"
     )
     
     # Get total count
-    total = query.count()
+    total = count_query(query)
     
     # Get paginated results
     images = query.order_by(
         desc(Image.created_at)
     ).offset(skip).limit(limit).all()
     
-    # Add tag list to each image
-    from app.api.api_v1.endpoints.images import add_tags_to_images
-    image_data = add_tags_to_images(db, images)
+    # Serialize with each image's tag names
+    image_data = [ImageSchema.model_validate(image) for image in images]
     
     return {
         "tag": {
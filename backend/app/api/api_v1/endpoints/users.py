@@ -1,14 +1,18 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_active_user, get_db, get_current_user_optional
 from app.models.user import User
 from app.models.image import Image, ImagePrivacy
+from app.models.follow import Follow
 from app.schemas.user import User as UserSchema, UserUpdate
 from app.schemas.image import Image as ImageSchema
 from app.schemas.follow import UserFollowInfo
 from app.core.security import get_password_hash
+from app.api.api_v1.endpoints.images import image_tag_options
+from app.utils.pagination import paginate_newest_first
 
 router = APIRouter()
 
@@ -38,7 +42,6 @@ def update_user_me(
     
     db.add(current_user)
     db.commit()
-    db.refresh(current_user)
     return current_user
 
 
@@ -70,54 +73,28 @@ def read_user_by_username(
 def read_user_public_images(
     *,
     db: Session = Depends(get_db),
+    response: Response,
     username: str,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
 ) -> Any:
+    """
+    Get a user's public images, newest first.
+    
+    Pass the X-Next-Cursor header as ``cursor`` to page without an offset.
+    """
     user = db.query(User).filter(User.username == username).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get only public images for public profile
-    images = db.query(Image).filter(
+    # Get only public images for public profile, with their tags in one
+    # batched load; ImageSchema maps them to tag names
+    query = db.query(Image).options(*image_tag_options).filter(
         Image.owner_id == user.id,
         Image.privacy == ImagePrivacy.PUBLIC
-    ).order_by(Image.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Build response data with proper tag serialization
-    result = []
-    for image in images:
-        # Convert ImageTag objects to tag names
-        tag_names = [tag.tag.name for tag in image.tags] if hasattr(image, 'tags') else []
-        
-        # Create image dict with proper tags
-        image_dict = {
-            "id": image.id,
-            "title": image.title,
-            "description": image.description,
-            "filename": image.filename,
-            "original_filename": image.original_filename,
-            "file_size": image.file_size,
-            "file_type": image.file_type,
-            "width": image.width,
-            "height": image.height,
-            "url": image.url,
-            "thumbnail_url": image.thumbnail_url,
-            "medium_url": image.medium_url,
-            "large_url": image.large_url,
-            "delete_hash": image.delete_hash,
-            "privacy": image.privacy,
-            "views": image.views,
-            "is_nsfw": image.is_nsfw,
-            "owner_id": image.owner_id,
-            "created_at": image.created_at,
-            "updated_at": image.updated_at,
-            "like_count": image.like_count,
-            "tags": tag_names
-        }
-        result.append(image_dict)
-    
-    return result
+    )
+    return paginate_newest_first(query, Image, response, skip, limit, cursor)
 
 
 @router.get("/{username}/profile", response_model=UserFollowInfo)
@@ -132,6 +109,16 @@ def read_user_profile(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # Counts and the follow status both ways in one round-trip, instead of
+    # loading every follows row of both users' relationships
+    viewer_id = current_user.id if current_user and current_user.id != user.id else None
+    stats = db.query(
+        select(func.count()).where(Follow.following_id == user.id).scalar_subquery().label("followers_count"),
+        select(func.count()).where(Follow.follower_id == user.id).scalar_subquery().label("following_count"),
+        exists().where(Follow.follower_id == viewer_id, Follow.following_id == user.id).label("is_following"),
+        exists().where(Follow.follower_id == user.id, Follow.following_id == viewer_id).label("is_followed_by"),
+    ).one()
+    
     # Create user follow info
     user_info = UserFollowInfo(
         id=user.id,
@@ -139,13 +126,13 @@ def read_user_profile(
         full_name=user.full_name,
         avatar_url=user.avatar_url,
         bio=user.bio,
-        followers_count=user.followers_count,
-        following_count=user.following_count
+        followers_count=stats.followers_count,
+        following_count=stats.following_count
     )
     
     # Add follow status if authenticated
-    if current_user and current_user.id != user.id:
-        user_info.is_following = current_user.is_following(user)
-        user_info.is_followed_by = user.is_followed_by(current_user)
+    if viewer_id is not None:
+        user_info.is_following = stats.is_following
+        user_info.is_followed_by = stats.is_followed_by
     
     return user_info
\ No newline at end of file
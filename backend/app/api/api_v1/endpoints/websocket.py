@@ -3,11 +3,13 @@ WebSocket endpoint for real-time notifications
 """
 from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 import logging
 
 from app.core.config import settings
+from app.core.security import get_signing_key
 from app.core.websocket import manager
 from app.api.deps import get_db
 from app.models.user import User
@@ -31,7 +33,7 @@ async def get_current_user_websocket(
     try:
         # Decode JWT token
         payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            token, get_signing_key(), algorithms=[settings.ALGORITHM]
         )
         username_or_id = payload.get("sub")
         
@@ -41,12 +43,16 @@ async def get_current_user_websocket(
         
         # Get user from database - try by username first (for compatibility)
         if isinstance(username_or_id, str) and not username_or_id.isdigit():
-            user = db.query(User).filter(User.username == username_or_id).first()
+            user = await run_in_threadpool(
+                db.query(User).filter(User.username == username_or_id).first
+            )
         else:
             # If it's numeric, try by ID
             try:
                 user_id = int(username_or_id)
-                user = db.query(User).filter(User.id == user_id).first()
+                user = await run_in_threadpool(
+                    db.query(User).filter(User.id == user_id).first
+                )
             except (ValueError, TypeError):
                 user = None
         
@@ -176,4 +182,14 @@ async def send_comment_to_room(image_id: int, message: dict, exclude_user: Optio
         exclude_user: Optional user ID to exclude from broadcast (usually the comment author)
     """
     room_id = f"image_{image_id}"
-    await manager.send_to_room(room_id, message, exclude_user)
\ No newline at end of file
+    await manager.send_to_room(room_id, message, exclude_user)
+
+
+def queue_comment_for_room(image_id: int, message: dict, exclude_user: Optional[int] = None):
+    """
+    Queue a comment-related message for the users viewing an image
+    
+    Unlike send_comment_to_room this can be called from sync endpoints; the
+    message is delivered by the connection manager's broadcast task.
+    """
+    manager.queue_room_message(f"image_{image_id}", message, exclude_user)
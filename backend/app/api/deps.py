@@ -63,6 +63,17 @@ def get_current_active_superuser(
     return current_user
 
 
+def get_admin_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403,
+            detail="Insufficient permissions. Admin access required."
+        )
+    return current_user
+
+
 def get_current_user_optional(
     db: Session = Depends(get_db),
     token: Optional[str] = Depends(oauth2_scheme)
@@ -3,6 +3,7 @@ Rate limiting middleware for FastAPI.
 """
 from typing import Optional, Callable
 from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 
@@ -28,6 +29,36 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         if request.url.path.startswith("/uploads"):
             return await call_next(request)
         
+        # User lookup, limit resolution and the Redis counter are all blocking
+        allowed, metadata = await run_in_threadpool(self._check_rate_limit, request)
+        
+        if not allowed:
+            # Rate limit exceeded
+            return JSONResponse(
+                status_code=429,
+                content={
+                    "detail": f"Rate limit exceeded. Try again in {metadata['retry_after']} seconds."
+                },
+                headers={
+                    "X-RateLimit-Limit": str(metadata["limit"]),
+                    "X-RateLimit-Remaining": str(metadata["remaining"]),
+                    "X-RateLimit-Reset": str(metadata["reset"]),
+                    "Retry-After": str(metadata["retry_after"])
+                }
+            )
+        
+        # Process request and add rate limit headers to response
+        response = await call_next(request)
+        
+        # Add rate limit headers
+        response.headers["X-RateLimit-Limit"] = str(metadata["limit"])
+        response.headers["X-RateLimit-Remaining"] = str(metadata["remaining"])
+        response.headers["X-RateLimit-Reset"] = str(metadata["reset"])
+        
+        return response
+    
+    def _check_rate_limit(self, request: Request) -> tuple:
+        """Resolve the caller and their limits, then record the request."""
         # Get identifier (IP address or user ID)
         client_ip = request.client.host if request.client else "unknown"
         
@@ -48,14 +79,12 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     payload = decode_token(token)
                     username = payload.get("sub")
                     if username:
-                        # Get user from database
+                        # Cached lookup; the database is only hit on a miss
                         db = next(get_db())
-                        from app.models.user import User
-                        user = db.query(User).filter(User.username == username).first()
-                        if user and user.is_active:
-                            user_id = user.id
-                            user_tier = user.effective_tier
-                        db.close()
+                        try:
+                            user_id, user_tier = rate_limiter.get_user_rate_info(username, db)
+                        finally:
+                            db.close()
                 except (JWTError, Exception):
                     # Invalid token, treat as anonymous
                     pass
@@ -81,35 +110,10 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 db.close()
         
         # Check rate limit
-        allowed, metadata = rate_limiter.check_rate_limit(
+        return rate_limiter.check_rate_limit(
             identifier=identifier,
             endpoint=endpoint,
             limit=limits["requests"],
             window=limits["window"],
             user_id=user_id
         )
-        
-        if not allowed:
-            # Rate limit exceeded
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "detail": f"Rate limit exceeded. Try again in {metadata['retry_after']} seconds."
-                },
-                headers={
-                    "X-RateLimit-Limit": str(metadata["limit"]),
-                    "X-RateLimit-Remaining": str(metadata["remaining"]),
-                    "X-RateLimit-Reset": str(metadata["reset"]),
-                    "Retry-After": str(metadata["retry_after"])
-                }
-            )
-        
-        # Process request and add rate limit headers to response
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(metadata["limit"])
-        response.headers["X-RateLimit-Remaining"] = str(metadata["remaining"])
-        response.headers["X-RateLimit-Reset"] = str(metadata["reset"])
-        
-        return response
\ No newline at end of file
@@ -1,6 +1,12 @@
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 
@@ -8,13 +14,37 @@ from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL while hashing, so a dedicated pool sized to the
+# cores runs hashes in parallel without occupying the request threadpool.
+password_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt"
+)
+
+
+@lru_cache()
+def get_signing_key() -> jwk.Key:
+    """JWT key object, built once instead of re-parsing the secret on every call"""
+    return jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+
+
+# Verified JWT payloads by token digest; see decode_token
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+verified_tokens: Dict[bytes, Dict[str, Any]] = {}
+
 
 class TokenData(BaseModel):
     username: Optional[str] = None
     scopes: list[str] = []
 
 
+# Stored instead of a bcrypt hash for accounts created through OAuth; no
+# password verifies against it, so password login is refused until one is set.
+UNUSABLE_PASSWORD = "!oauth"
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
     return pwd_context.verify(plain_password, hashed_password)
 
 
@@ -22,6 +52,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -29,7 +71,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, get_signing_key(), algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
@@ -37,13 +79,43 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, get_signing_key(), algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def decode_token(token: str) -> Dict[str, Any]:
+    # The same token arrives on every request of a session (and is decoded by
+    # both the rate limiter and the auth dependency), so verified payloads are
+    # kept until the token expires
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = verified_tokens.get(key)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            return dict(payload)
+        verified_tokens.pop(key, None)
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = jwt.decode(token, get_signing_key(), algorithms=[settings.ALGORITHM])
     except JWTError:
-        raise ValueError("Could not validate credentials")
\ No newline at end of file
+        raise ValueError("Could not validate credentials")
+    
+    if isinstance(payload.get("exp"), (int, float)):
+        if len(verified_tokens) >= VERIFIED_TOKEN_CACHE_SIZE:
+            evict_verified_tokens()
+        verified_tokens[key] = dict(payload)
+    return payload
+
+
+def evict_verified_tokens():
+    """Drop expired payloads, then the oldest ones if the cache is still full"""
+    # Snapshots, as request threads may insert while this runs
+    now = time.time()
+    for key, payload in list(verified_tokens.items()):
+        if payload["exp"] <= now:
+            verified_tokens.pop(key, None)
+    # Dicts keep insertion order, so the first keys are the oldest; free a
+    # tenth of the cache so a run of new tokens doesn't rescan it every time
+    excess = len(verified_tokens) - VERIFIED_TOKEN_CACHE_SIZE * 9 // 10
+    if excess > 0:
+        for key in list(verified_tokens)[:excess]:
+            verified_tokens.pop(key, None)
\ No newline at end of file
@@ -1,7 +1,8 @@
 """
 WebSocket connection manager for real-time notifications
 """
-from typing import Dict, Set, Optional
+from typing import Dict, Set, Optional, Tuple
+import asyncio
 import json
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
@@ -9,6 +10,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Room broadcasts yield to the event loop after this many recipients
+ROOM_SEND_BATCH_SIZE = 50
+
+# Messages buffered per connection before further ones are dropped
+CONNECTION_QUEUE_SIZE = 32
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time notifications and comments"""
@@ -18,6 +25,59 @@ class ConnectionManager:
         self.active_connections: Dict[int, Set[WebSocket]] = {}
         # Dictionary mapping room_id to set of user_ids in that room
         self.rooms: Dict[str, Set[int]] = {}
+        # Per-connection outgoing queues, each drained by its own relay task so
+        # a slow client only delays itself
+        self.outboxes: Dict[WebSocket, asyncio.Queue[str]] = {}
+        self.relays: Dict[WebSocket, asyncio.Task] = {}
+        # Room messages queued from request threads, delivered on the app's loop
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.room_queue: Optional[asyncio.Queue[Tuple[str, dict, Optional[int]]]] = None
+    
+    def start_broadcaster(self):
+        """Start the task that delivers queued room messages; call from app startup"""
+        self.loop = asyncio.get_running_loop()
+        self.room_queue = asyncio.Queue()
+        self.loop.create_task(self._broadcast_worker())
+    
+    async def _broadcast_worker(self):
+        """Deliver queued room messages one at a time"""
+        while True:
+            room_id, message, exclude_user = await self.room_queue.get()
+            try:
+                await self.send_to_room(room_id, message, exclude_user)
+            except Exception as e:
+                logger.error(f"Error broadcasting to room {room_id}: {e}")
+            # Give connection relays a turn so a burst doesn't fill their queues
+            await asyncio.sleep(0)
+    
+    def queue_room_message(self, room_id: str, message: dict, exclude_user: Optional[int] = None):
+        """Queue a message for a room; safe to call from sync endpoints' threads"""
+        if self.loop is None:
+            logger.warning(f"Broadcaster not running, dropping message for room {room_id}")
+            return
+        self.loop.call_soon_threadsafe(
+            self.room_queue.put_nowait, (room_id, message, exclude_user)
+        )
+    
+    def queue_personal_message(self, message: dict, user_id: int):
+        """Queue a message for a user; safe to call from sync endpoints' threads"""
+        if self.loop is None:
+            logger.warning(f"Broadcaster not running, dropping message for user {user_id}")
+            return
+        self.loop.call_soon_threadsafe(
+            self.loop.create_task, self.send_personal_message(message, user_id)
+        )
+    
+    async def _relay(self, websocket: WebSocket, user_id: int, outbox: asyncio.Queue):
+        """Send a connection's queued messages in order"""
+        while True:
+            text = await outbox.get()
+            try:
+                await websocket.send_text(text)
+            except Exception as e:
+                logger.error(f"Error sending message to user {user_id}: {e}")
+                self.disconnect(websocket, user_id)
+                return
     
     async def connect(self, websocket: WebSocket, user_id: int):
         """Accept WebSocket connection and add to active connections"""
@@ -27,10 +87,18 @@ class ConnectionManager:
             self.active_connections[user_id] = set()
         
         self.active_connections[user_id].add(websocket)
+        outbox = asyncio.Queue(maxsize=CONNECTION_QUEUE_SIZE)
+        self.outboxes[websocket] = outbox
+        self.relays[websocket] = asyncio.create_task(self._relay(websocket, user_id, outbox))
         logger.info(f"User {user_id} connected. Total connections: {len(self.active_connections[user_id])}")
     
     def disconnect(self, websocket: WebSocket, user_id: int):
         """Remove WebSocket from active connections"""
+        self.outboxes.pop(websocket, None)
+        relay = self.relays.pop(websocket, None)
+        if relay and relay is not asyncio.current_task():
+            relay.cancel()
+        
         if user_id in self.active_connections:
             self.active_connections[user_id].discard(websocket)
             
@@ -42,19 +110,18 @@ class ConnectionManager:
     
     async def send_personal_message(self, message: dict, user_id: int):
         """Send message to all connections of a specific user"""
-        if user_id in self.active_connections:
-            disconnected = set()
-            
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending message to user {user_id}: {e}")
-                    disconnected.add(connection)
-            
-            # Clean up disconnected connections
-            for conn in disconnected:
-                self.active_connections[user_id].discard(conn)
+        await self.send_personal_text(json.dumps(message), user_id)
+    
+    async def send_personal_text(self, text: str, user_id: int):
+        """Queue an already-encoded JSON message on all connections of a user"""
+        for connection in list(self.active_connections.get(user_id, ())):
+            outbox = self.outboxes.get(connection)
+            if outbox is None:
+                continue
+            try:
+                outbox.put_nowait(text)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping message for user {user_id}: connection is not keeping up")
     
     async def broadcast(self, message: dict, exclude_user: Optional[int] = None):
         """Broadcast message to all connected users"""
@@ -95,13 +162,20 @@ class ConnectionManager:
         """Send message to all users in a room"""
         if room_id in self.rooms:
             print(f"Room {room_id} users: {self.rooms[room_id]}, excluding: {exclude_user}")
-            for user_id in self.rooms[room_id]:
+            # Encode once for the whole room rather than per connection
+            text = json.dumps(message)
+            # Snapshot the members: the loop yields, so users may join or leave meanwhile
+            for sent, user_id in enumerate(list(self.rooms[room_id]), 1):
                 if exclude_user and user_id == exclude_user:
                     print(f"Excluding user {user_id} from message")
                     continue
                 
                 print(f"Sending message to user {user_id}: {message.get('type')}")
-                await self.send_personal_message(message, user_id)
+                await self.send_personal_text(text, user_id)
+                
+                # Let other tasks run between batches in large rooms
+                if sent % ROOM_SEND_BATCH_SIZE == 0:
+                    await asyncio.sleep(0)
 
 
 # Global connection manager instance
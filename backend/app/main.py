@@ -2,11 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
+import anyio
 
 from app.core.config import settings
 from app.core.database import engine, Base
 from app.api.api_v1.api import api_router
 from app.api.middleware.rate_limit import RateLimitMiddleware
+from app.core.websocket import manager
+from app.services.notification_outbox import notification_outbox
+from app.services.view_counter import view_counter
+from app.services.popular_terms import popular_terms_refresher
 
 # Note: Database tables are created via Alembic migrations
 # Do NOT use Base.metadata.create_all as it can create inconsistent schemas
@@ -27,7 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"]
+    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "X-Next-Cursor"]
 )
 
 # Note: We're using MinIO/S3 for file storage, so no static file mounting needed
@@ -37,6 +42,50 @@ app.add_middleware(
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.on_event("startup")
+async def size_threadpool():
+    # Sync endpoints run in anyio's worker threads and each holds a DB
+    # connection, so match the thread limit to the connection pool instead
+    # of letting extra threads queue on the pool.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+@app.on_event("startup")
+async def start_websocket_broadcaster():
+    # Comment events from sync endpoints are queued and sent on this loop
+    manager.start_broadcaster()
+
+
+@app.on_event("startup")
+async def start_notification_outbox():
+    # Comment notifications are inserted in batches by this task
+    notification_outbox.start()
+
+
+@app.on_event("startup")
+async def start_view_counter():
+    # Image views are buffered in memory and written every few seconds
+    view_counter.start()
+
+
+@app.on_event("startup")
+async def start_popular_terms_refresher():
+    # The popular search terms view is rebuilt every few minutes
+    popular_terms_refresher.start()
+
+
+@app.on_event("shutdown")
+async def flush_view_counter():
+    view_counter.flush()
+
+
+@app.on_event("shutdown")
+async def drain_notification_outbox():
+    # Write queued notifications before the process exits
+    await notification_outbox.drain()
+
+
 @app.get("/")
 async def root():
     return {
@@ -5,5 +5,6 @@ from app.models.comment import Comment
 from app.models.like import Like
 from app.models.notification import Notification, NotificationType
 from app.models.tag import Tag, ImageTag
+from app.models.stopword import Stopword
 
-__all__ = ["User", "Image", "Album", "AlbumImage", "Comment", "Like", "Notification", "NotificationType", "Tag", "ImageTag"]
\ No newline at end of file
+__all__ = ["User", "Image", "Album", "AlbumImage", "Comment", "Like", "Notification", "NotificationType", "Tag", "ImageTag", "Stopword"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -30,6 +30,12 @@ class Album(Base):
     owner = relationship("User", back_populates="albums")
     images = relationship("AlbumImage", back_populates="album", cascade="all, delete-orphan", order_by="AlbumImage.position")
     cover_image = relationship("Image", foreign_keys=[cover_image_id])
+    
+    __table_args__ = (
+        # Keyset pagination of public and per-owner album listings
+        Index('ix_albums_privacy_id', 'privacy', 'id'),
+        Index('ix_albums_owner_id_id', 'owner_id', 'id'),
+    )
 
 
 class AlbumImage(Base):
@@ -42,4 +48,9 @@ class AlbumImage(Base):
     
     # Relationships
     album = relationship("Album", back_populates="images")
-    image = relationship("Image", back_populates="albums")
\ No newline at end of file
+    image = relationship("Image", back_populates="albums")
+    
+    __table_args__ = (
+        # Ordered album contents and MAX(position) lookups when appending
+        Index('ix_album_images_album_id_position', 'album_id', 'position'),
+    )
\ No newline at end of file
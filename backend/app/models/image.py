@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, Index, Computed, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -31,9 +31,13 @@ class Image(Base):
     delete_hash = Column(String(100), unique=True, index=True)
     privacy = Column(Enum(ImagePrivacy), default=ImagePrivacy.PUBLIC)
     views = Column(Integer, default=0)
+    # Maintained by the like/unlike endpoints so listings needn't count likes
+    like_count = Column(Integer, default=0, server_default='0', nullable=False)
+    # Explore ranking; a stored generated column, so the database keeps it current
+    popularity_score = Column(Integer, Computed("like_count + COALESCE(views, 0) / 10", persisted=True))
     is_nsfw = Column(Boolean, default=False)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -43,6 +47,25 @@ class Image(Base):
     likes = relationship("Like", back_populates="image", cascade="all, delete-orphan")
     tags = relationship("ImageTag", back_populates="image", cascade="all, delete-orphan")
     
-    @property
-    def like_count(self):
-        return len(self.likes)
\ No newline at end of file
+    __table_args__ = (
+        # Keyset pagination on (created_at, id)
+        Index('ix_images_created_at_id', 'created_at', 'id'),
+        # Newest-first listings filtered by privacy
+        Index('ix_images_privacy_created_at', privacy, created_at.desc()),
+        # Explore feed ordering over public images
+        Index('ix_images_public_popularity', popularity_score.desc(), id.desc(),
+              postgresql_where=text("privacy = 'PUBLIC'")),
+        # Activity feed: followed owners' public images, newest first
+        Index('ix_images_public_owner_created_at', owner_id, created_at.desc(), id.desc(),
+              postgresql_where=text("privacy = 'PUBLIC'")),
+        # Public gallery sorted by views or likes
+        Index('ix_images_public_views', views.desc(),
+              postgresql_where=text("privacy = 'PUBLIC'")),
+        Index('ix_images_public_like_count', like_count.desc(),
+              postgresql_where=text("privacy = 'PUBLIC'")),
+        # Trigram indexes for the ILIKE '%term%' search suggestions (requires pg_trgm)
+        Index('ix_images_public_title_trgm', title, postgresql_using='gin',
+              postgresql_ops={'title': 'gin_trgm_ops'}, postgresql_where=text("privacy = 'PUBLIC'")),
+        Index('ix_images_public_description_trgm', description, postgresql_using='gin',
+              postgresql_ops={'description': 'gin_trgm_ops'}, postgresql_where=text("privacy = 'PUBLIC'")),
+    )
\ No newline at end of file
@@ -2,7 +2,7 @@
 Notification model for real-time notifications
 """
 from typing import TYPE_CHECKING
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, JSON, Text
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, JSON, Text, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -63,6 +63,14 @@ class Notification(Base):
     related_image = relationship("Image", foreign_keys=[related_image_id])
     related_album = relationship("Album", foreign_keys=[related_album_id])
     
+    __table_args__ = (
+        # A user's notifications, newest first
+        Index('ix_notifications_user_created_at', user_id, created_at.desc()),
+        # Unread-only listing and the unread count
+        Index('ix_notifications_user_unread_created_at', user_id, created_at.desc(),
+              postgresql_where=text("read = false")),
+    )
+    
     def mark_as_read(self):
         """Mark notification as read"""
         self.read = True
@@ -18,4 +18,6 @@ class RateLimit(Base):
     
     __table_args__ = (
         UniqueConstraint('endpoint', 'tier', name='uq_rate_limits_endpoint_tier'),
-    )
\ No newline at end of file
+    )
+    # Fetch the server-side timestamps with RETURNING as part of the flush
+    __mapper_args__ = {"eager_defaults": True}
\ No newline at end of file
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String
+
+from app.core.database import Base
+
+
+class Stopword(Base):
+    """Words left out of popular search terms"""
+    __tablename__ = "stopwords"
+    
+    word = Column(String(50), primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -11,14 +11,18 @@ class Tag(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Images using this tag; a trigger on image_tags keeps it current
+    usage_count = Column(Integer, default=0, server_default='0', nullable=False)
     
     # Relationships
     images = relationship("ImageTag", back_populates="tag", cascade="all, delete-orphan")
     
-    @property
-    def usage_count(self):
-        """Calculate usage count from relationships"""
-        return len(self.images) if self.images else 0
+    __table_args__ = (
+        # Trigram index so tag search's ILIKE '%term%' avoids a full scan (requires pg_trgm)
+        Index('ix_tags_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        # Popular tags and tag search ordering
+        Index('ix_tags_usage_count', usage_count.desc(), 'name'),
+    )
     
     def __repr__(self):
         return f"<Tag(name='{self.name}', usage_count={self.usage_count})>"
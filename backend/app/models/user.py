@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, func, select
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, func, select
 from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime, timedelta
@@ -34,9 +34,22 @@ class User(Base):
     google_id = Column(String(255), unique=True)
     github_id = Column(String(255), unique=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Trigram indexes so admin ILIKE '%term%' searches avoid full scans (requires pg_trgm)
+        Index('ix_users_username_trgm', 'username', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}),
+        Index('ix_users_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+        Index('ix_users_full_name_trgm', 'full_name', postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'}),
+        # Token lookups for email verification and password reset; most rows
+        # have no outstanding token, so only index the ones that do
+        Index('ix_users_email_verification_token', email_verification_token,
+              postgresql_where=email_verification_token.isnot(None)),
+        Index('ix_users_password_reset_token', password_reset_token,
+              postgresql_where=password_reset_token.isnot(None)),
+    )
+    
     # Relationships
     images = relationship("Image", back_populates="owner", cascade="all, delete-orphan")
     albums = relationship("Album", back_populates="owner", cascade="all, delete-orphan")
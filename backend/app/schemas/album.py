@@ -1,6 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, AliasChoices, field_validator, model_validator
 
 from app.models.album import AlbumPrivacy
 from app.schemas.image import Image
@@ -36,8 +36,24 @@ class AlbumInDBBase(AlbumBase):
 
 
 class Album(AlbumInDBBase):
-    images: List[Image] = []
+    # Album listings attach a few preview_images; a single album embeds all of them
+    images: List[Image] = Field(
+        default=[], validation_alias=AliasChoices("preview_images", "images")
+    )
     image_count: int = 0
+    
+    @field_validator("images", mode="before")
+    @classmethod
+    def album_images(cls, v):
+        """Accept Album.images (AlbumImage rows) as well as plain images"""
+        return [getattr(i, "image", i) for i in v or []]
+    
+    @model_validator(mode="after")
+    def default_image_count(self):
+        """Count the embedded images unless a total was supplied"""
+        if "image_count" not in self.model_fields_set:
+            self.image_count = len(self.images)
+        return self
 
 
 class AlbumInDB(AlbumInDBBase):
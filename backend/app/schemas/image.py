@@ -1,6 +1,6 @@
 from typing import Optional, Dict, List
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 
 from app.models.image import ImagePrivacy
 
@@ -50,6 +50,12 @@ class Image(ImageInDBBase):
     optimized_urls: Optional[Dict[str, str]] = None
     # Tags associated with the image
     tags: List[str] = []
+    
+    @field_validator("tags", mode="before")
+    @classmethod
+    def tag_names(cls, v):
+        """Accept Image.tags (ImageTag rows) as well as plain tag names"""
+        return [t.tag.name if hasattr(t, "tag") else t for t in v or []]
 
 
 class ImageInDB(ImageInDBBase):
@@ -1,22 +1,33 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from functools import lru_cache
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 import re
 
+# Letters, numbers, spaces, hyphens and underscores; checked for every tag
+# name validated, including each tag in API responses
+TAG_NAME_PATTERN = re.compile(r'^[\w\s-]+$')
+
+
+@lru_cache(maxsize=4096)
+def clean_tag_name(name: str) -> Tuple[str, bool]:
+    """Collapse whitespace and lowercase a tag name; also report whether its characters are allowed"""
+    cleaned = ' '.join(name.split()).lower()
+    return cleaned, TAG_NAME_PATTERN.match(cleaned) is not None
+
 
 class TagBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
     
     @validator('name')
     def validate_tag_name(cls, v):
-        # Remove extra whitespace
-        v = ' '.join(v.split())
-        
-        # Check for valid characters (alphanumeric, spaces, hyphens, underscores)
-        if not re.match(r'^[\w\s-]+$', v):
+        # Remove extra whitespace and check for valid characters
+        # (alphanumeric, spaces, hyphens, underscores)
+        v, valid = clean_tag_name(v)
+        if not valid:
             raise ValueError('Tag names can only contain letters, numbers, spaces, hyphens, and underscores')
         
-        return v.lower()
+        return v
 
 
 class TagCreate(TagBase):
@@ -52,14 +63,14 @@ class ImageTagAdd(BaseModel):
         
         for tag in v:
             # Clean the tag
-            tag = ' '.join(tag.split()).lower()
+            tag, valid = clean_tag_name(tag)
             
             # Validate length
             if len(tag) < 1 or len(tag) > 50:
                 raise ValueError(f'Tag "{tag}" must be between 1 and 50 characters')
             
             # Check for valid characters
-            if not re.match(r'^[\w\s-]+$', tag):
+            if not valid:
                 raise ValueError(f'Tag "{tag}" contains invalid characters')
             
             # Add if not duplicate
@@ -1,6 +1,6 @@
 import json
 import pickle
-from typing import Optional, Any, Union
+from typing import Callable, Optional, Any, Union
 from functools import wraps
 import hashlib
 import time
@@ -131,9 +131,10 @@ class CacheService:
         """Invalidate cache keys matching pattern"""
         if self.redis_client:
             try:
-                keys = self.redis_client.keys(f"{self._generate_key(pattern)}*")
-                if keys:
-                    self.redis_client.delete(*keys)
+                # SCAN rather than KEYS so a large keyspace doesn't block Redis
+                keys = list(self.redis_client.scan_iter(f"{self._generate_key(pattern)}*", count=500))
+                for i in range(0, len(keys), 500):
+                    self.redis_client.unlink(*keys[i:i + 500])
             except Exception as e:
                 print(f"Redis pattern invalidation error: {e}")
         
@@ -153,30 +154,41 @@ class CacheService:
 cache_service = CacheService()
 
 
-def cache_result(ttl: int = 3600, key_prefix: str = ""):
-    """Decorator to cache function results"""
+def cache_result(
+    ttl: int = 3600,
+    key_prefix: str = "",
+    key_builder: Optional[Callable[[dict], str]] = None,
+):
+    """Decorator to cache function results
+
+    key_builder, if given, turns the call's keyword arguments into the part of
+    the key after the prefix.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key from function name and arguments
-            key_parts = [key_prefix or func.__name__]
-            
-            # Add positional args to key
-            for arg in args:
-                if isinstance(arg, (str, int, float, bool)):
-                    key_parts.append(str(arg))
-                else:
-                    # Hash complex objects
-                    key_parts.append(hashlib.md5(str(arg).encode()).hexdigest()[:8])
-            
-            # Add keyword args to key
-            for k, v in sorted(kwargs.items()):
-                if isinstance(v, (str, int, float, bool)):
-                    key_parts.append(f"{k}:{v}")
-                else:
-                    key_parts.append(f"{k}:{hashlib.md5(str(v).encode()).hexdigest()[:8]}")
-            
-            cache_key = ":".join(key_parts)
+            if key_builder is not None:
+                cache_key = f"{key_prefix or func.__name__}:{key_builder(kwargs)}"
+            else:
+                # Generate cache key from function name and arguments
+                key_parts = [key_prefix or func.__name__]
+                
+                # Add positional args to key
+                for arg in args:
+                    if isinstance(arg, (str, int, float, bool)):
+                        key_parts.append(str(arg))
+                    else:
+                        # Hash complex objects
+                        key_parts.append(hashlib.md5(str(arg).encode()).hexdigest()[:8])
+                
+                # Add keyword args to key
+                for k, v in sorted(kwargs.items()):
+                    if isinstance(v, (str, int, float, bool)):
+                        key_parts.append(f"{k}:{v}")
+                    else:
+                        key_parts.append(f"{k}:{hashlib.md5(str(v).encode()).hexdigest()[:8]}")
+                
+                cache_key = ":".join(key_parts)
             
             # Try to get from cache
             cached_result = cache_service.get(cache_key)
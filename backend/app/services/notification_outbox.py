@@ -0,0 +1,143 @@
+"""
+Buffered notification writes, flushed in batches off the request path
+"""
+from typing import List, Optional
+import asyncio
+import logging
+import threading
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.core.websocket import manager
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+# Notifications written per INSERT
+NOTIFICATION_BATCH_SIZE = 200
+
+# Seconds a batch waits to fill up before it is written anyway
+NOTIFICATION_FLUSH_INTERVAL = 0.1
+
+# Pending notifications held in memory before new ones are written inline
+NOTIFICATION_QUEUE_SIZE = 10000
+
+
+class NotificationOutbox:
+    """Collects notification rows from request threads and inserts them in batches"""
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Unbounded; capacity is reserved in enqueue so a put never fails
+        self.queue: Optional[asyncio.Queue[Optional[dict]]] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.stopping = False
+
+    def start(self):
+        """Start the flush task; call from app startup"""
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.worker = self.loop.create_task(self._flush_worker())
+
+    def enqueue(self, values: dict) -> bool:
+        """Queue a notification row; returns False if the caller should write it itself"""
+        with self.lock:
+            if self.loop is None or self.stopping or self.pending >= NOTIFICATION_QUEUE_SIZE:
+                return False
+            self.pending += 1
+            # Scheduled under the lock so it lands ahead of drain's end-of-queue marker
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, values)
+        return True
+
+    async def drain(self):
+        """Stop queueing and write everything still queued; call from app shutdown"""
+        with self.lock:
+            if self.worker is None or self.stopping:
+                return
+            self.stopping = True
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+        await self.worker
+
+    async def _next(self) -> Optional[dict]:
+        values = await self.queue.get()
+        if values is not None:
+            with self.lock:
+                self.pending -= 1
+        return values
+
+    async def _flush_worker(self):
+        """Gather up to a batch (or a flush interval's worth) and write it"""
+        while True:
+            values = await self._next()
+            if values is None:
+                return
+            batch = [values]
+            stopping = False
+            deadline = self.loop.time() + NOTIFICATION_FLUSH_INTERVAL
+            while len(batch) < NOTIFICATION_BATCH_SIZE:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    values = await asyncio.wait_for(self._next(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if values is None:
+                    # drain() was called; write this last batch and stop
+                    stopping = True
+                    break
+                batch.append(values)
+
+            try:
+                payloads = await run_in_threadpool(self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} notifications: {e}")
+                payloads = []
+
+            for user_id, payload in payloads:
+                await manager.send_personal_message(payload, user_id)
+
+            if stopping:
+                return
+
+    @staticmethod
+    def _write_batch(batch: List[dict]) -> List[tuple]:
+        """Insert a batch and return the real-time messages for online recipients"""
+        from app.services.notification_service import NotificationService
+
+        db = SessionLocal()
+        try:
+            try:
+                notifications = db.scalars(insert(Notification).returning(Notification), batch).all()
+                db.commit()
+            except Exception as e:
+                # One bad row (e.g. a recipient deleted meanwhile) shouldn't lose the rest
+                db.rollback()
+                logger.warning(f"Batch notification insert failed, retrying rows individually: {e}")
+                notifications = []
+                for values in batch:
+                    try:
+                        notifications.append(db.scalars(insert(Notification).returning(Notification), [values]).one())
+                        db.commit()
+                    except Exception as row_error:
+                        db.rollback()
+                        logger.error(f"Dropping notification for user {values['user_id']}: {row_error}")
+
+            NotificationService.invalidate_unread_count(
+                *{notification.user_id for notification in notifications}
+            )
+            return [
+                (notification.user_id, NotificationService._realtime_payload(notification))
+                for notification in notifications
+                if manager.is_user_online(notification.user_id)
+            ]
+        finally:
+            db.close()
+
+
+# Global notification outbox instance
+notification_outbox = NotificationOutbox()
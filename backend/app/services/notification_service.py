@@ -2,6 +2,7 @@
 Notification service for creating and sending notifications
 """
 from typing import Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 import json
 import asyncio
@@ -9,6 +10,12 @@ import asyncio
 from app.models.notification import Notification, NotificationType
 from app.models.user import User
 from app.schemas.notification import NotificationCreate
+from app.services.notification_outbox import notification_outbox
+from app.services.cache import cache_service
+
+# Seconds a cached unread count lives; every write that changes it also
+# drops the cached value
+UNREAD_COUNT_TTL = 300
 # Import moved to avoid circular dependency
 
 
@@ -44,7 +51,7 @@ class NotificationService:
         
         db.add(notification)
         db.commit()
-        db.refresh(notification)
+        NotificationService.invalidate_unread_count(user_id)
         
         # Send real-time notification if user is online
         try:
@@ -63,8 +70,11 @@ class NotificationService:
                     # We're in an async context, create task
                     asyncio.create_task(NotificationService._send_realtime_notification(notification))
                 else:
-                    # We're in a sync context, run synchronously
-                    asyncio.run(NotificationService._send_realtime_notification(notification))
+                    # We're in a sync endpoint's thread; hand off to the app's loop
+                    manager.queue_personal_message(
+                        NotificationService._realtime_payload(notification),
+                        user_id
+                    )
             else:
                 print(f"User {user_id} is not online, skipping real-time notification")
         except Exception as e:
@@ -73,6 +83,45 @@ class NotificationService:
         
         return notification
     
+    @staticmethod
+    def get_unread_count(db: Session, user_id: int) -> int:
+        """Unread notification count, served from cache when possible"""
+        key = f"unread_count:{user_id}"
+        count = cache_service.get(key)
+        if count is None:
+            count = db.query(func.count(Notification.id)).filter(
+                Notification.user_id == user_id,
+                Notification.read == False
+            ).scalar()
+            cache_service.set(key, count, ttl=UNREAD_COUNT_TTL)
+        return count
+    
+    @staticmethod
+    def invalidate_unread_count(*user_ids: int):
+        """Drop cached unread counts after notifications are added, read or deleted"""
+        for user_id in user_ids:
+            cache_service.delete(f"unread_count:{user_id}")
+    
+    @staticmethod
+    def queue_notification(db: Session, **values) -> Optional[Notification]:
+        """Hand a notification to the batching outbox, writing it inline if the outbox isn't running"""
+        if notification_outbox.enqueue(values):
+            return None
+        return NotificationService.create_notification(db, **values)
+    
+    @staticmethod
+    def _realtime_payload(notification: Notification) -> dict:
+        """WebSocket message for a notification"""
+        return {
+            "type": "notification",
+            "id": str(notification.id),
+            "notification_type": notification.type.value,
+            "title": notification.title,
+            "message": notification.message,
+            "timestamp": notification.created_at.isoformat(),
+            "data": notification.data
+        }
+    
     @staticmethod
     async def _send_realtime_notification(notification: Notification):
         """Send notification through WebSocket if user is online"""
@@ -81,15 +130,7 @@ class NotificationService:
             from app.core.websocket import manager
             
             await manager.send_personal_message(
-                {
-                    "type": "notification",
-                    "id": str(notification.id),
-                    "notification_type": notification.type.value,
-                    "title": notification.title,
-                    "message": notification.message,
-                    "timestamp": notification.created_at.isoformat(),
-                    "data": notification.data
-                },
+                NotificationService._realtime_payload(notification),
                 notification.user_id
             )
         except Exception as e:
@@ -106,12 +147,12 @@ class NotificationService:
         image_title: str,
         comment_preview: str
     ) -> Optional[Notification]:
-        """Send notification for new comment"""
+        """Send notification for new comment (written asynchronously in a batch)"""
         # Don't notify if user is commenting on their own image
         if image_owner_id == commenter.id:
             return None
         
-        return NotificationService.create_notification(
+        return NotificationService.queue_notification(
             db,
             user_id=image_owner_id,
             type=NotificationType.COMMENT,
@@ -162,12 +203,12 @@ class NotificationService:
         image_title: str,
         reply_preview: str
     ) -> Optional[Notification]:
-        """Send notification for comment reply"""
+        """Send notification for comment reply (written asynchronously in a batch)"""
         # Don't notify if user is replying to their own comment
         if parent_comment_author_id == replier.id:
             return None
         
-        return NotificationService.create_notification(
+        return NotificationService.queue_notification(
             db,
             user_id=parent_comment_author_id,
             type=NotificationType.COMMENT,
@@ -238,7 +279,7 @@ class NotificationService:
         if notification and not notification.read:
             notification.mark_as_read()
             db.commit()
-            db.refresh(notification)
+            NotificationService.invalidate_unread_count(user_id)
         
         return notification
     
@@ -249,10 +290,12 @@ class NotificationService:
         user_id: int
     ) -> int:
         """Mark all notifications as read for a user"""
+        # One UPDATE however many are unread; nothing is loaded into the session
         count = db.query(Notification).filter(
             Notification.user_id == user_id,
             Notification.read == False
-        ).update({"read": True, "read_at": db.func.now()})
+        ).update({"read": True, "read_at": func.now()}, synchronize_session=False)
         
         db.commit()
+        NotificationService.invalidate_unread_count(user_id)
         return count
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Periodic refresh of the popular_terms materialized view
+"""
+import asyncio
+import logging
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Seconds between refreshes of popular_terms
+POPULAR_TERMS_REFRESH_INTERVAL = 600
+
+# Advisory lock key so only one worker refreshes at a time
+POPULAR_TERMS_LOCK_ID = 7420001
+
+
+class PopularTermsRefresher:
+    """Recomputes the word counts behind /search/popular-terms off the request path"""
+
+    def start(self):
+        """Start the periodic refresh task; call from app startup"""
+        asyncio.get_running_loop().create_task(self._refresh_worker())
+
+    async def _refresh_worker(self):
+        while True:
+            await asyncio.sleep(POPULAR_TERMS_REFRESH_INTERVAL)
+            try:
+                await run_in_threadpool(self.refresh)
+            except Exception as e:
+                logger.error(f"Failed to refresh popular terms: {e}")
+
+    def refresh(self):
+        """Refresh the view unless another worker is already doing it"""
+        db = SessionLocal()
+        try:
+            locked = db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+                {"lock_id": POPULAR_TERMS_LOCK_ID}
+            ).scalar()
+            if locked:
+                # CONCURRENTLY keeps the view readable while it is rebuilt
+                db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY popular_terms"))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global popular terms refresher instance
+popular_terms_refresher = PopularTermsRefresher()
@@ -9,11 +9,49 @@ import redis
 from fastapi import Request, HTTPException, status
 
 from app.core.config import settings
+from app.services.cache import cache_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Seconds the rate_limits table is cached per worker; admin edits also reload it
+RATE_LIMIT_CONFIG_TTL = 60
+
+# Seconds a token holder's (user id, tier) is cached for the middleware;
+# deactivating or deleting the user drops it sooner
+USER_TIER_TTL = 3600
+
+# Built-in limits, used when the rate_limits table has no entry
+DEFAULT_RATE_LIMITS = {
+    # Authentication endpoints
+    "/api/v1/auth/login": {
+        "anonymous": {"requests": 5, "window": 300},  # 5 per 5 minutes
+        "standard": {"requests": 10, "window": 300},
+        "premium": {"requests": 20, "window": 300}
+    },
+    "/api/v1/auth/register": {
+        "anonymous": {"requests": 3, "window": 3600},  # 3 per hour
+        "standard": {"requests": 5, "window": 3600},
+        "premium": {"requests": 10, "window": 3600}
+    },
+    
+    # Image upload endpoint
+    "/api/v1/images": {
+        "anonymous": {"requests": 10, "window": 3600},  # 10 per hour
+        "standard": {"requests": 100, "window": 3600},  # 100 per hour
+        "premium": {"requests": 1000, "window": 3600}   # 1000 per hour
+    },
+    
+    # General API endpoints
+    "default": {
+        "anonymous": {"requests": 100, "window": 3600},  # 100 per hour
+        "standard": {"requests": 1000, "window": 3600},  # 1000 per hour
+        "premium": {"requests": 10000, "window": 3600}   # 10000 per hour
+    }
+}
+
+
 class RateLimitExceeded(HTTPException):
     """Custom exception for rate limit exceeded."""
     def __init__(self, retry_after: int):
@@ -30,6 +68,8 @@ class RateLimiter:
     def __init__(self, redis_url: str = None):
         self.redis_url = redis_url or settings.REDIS_URL
         self.redis_client = None
+        self._configured_limits: Optional[Dict[Tuple[str, str], Dict[str, int]]] = None
+        self._configured_limits_loaded = 0.0
         self._connect()
     
     def _connect(self):
@@ -58,6 +98,30 @@ class RateLimiter:
         # Default to standard for authenticated users
         return "standard"
     
+    def get_user_rate_info(self, username: str, db) -> Tuple[Optional[int], str]:
+        """
+        Resolve a token's username to (user_id, tier) for rate limiting.
+        
+        Inactive or unknown users count as anonymous, (None, "anonymous").
+        Cached per username so the middleware needn't query users on every request.
+        """
+        key = f"rate_limit_user:{username}"
+        cached = cache_service.get(key)
+        if cached is None:
+            from app.models.user import User
+            
+            user = db.query(User.id, User.is_active, User.tier).filter(User.username == username).first()
+            if user and user.is_active:
+                cached = [user.id, user.tier or "standard"]
+            else:
+                cached = [None, "anonymous"]
+            cache_service.set(key, cached, ttl=USER_TIER_TTL)
+        return cached[0], cached[1]
+    
+    def invalidate_user_rate_info(self, username: str):
+        """Forget a user's cached id and tier after their status or tier changes."""
+        cache_service.delete(f"rate_limit_user:{username}")
+    
     def check_rate_limit(
         self, 
         identifier: str, 
@@ -141,67 +205,39 @@ class RateLimiter:
         
         Returns dict with 'requests' and 'window' keys.
         """
-        # Try to get from database first
+        # Try the configured limits first: exact endpoint match, then default
         if db:
             try:
-                from app.models.rate_limit import RateLimit
-                
-                # Try exact endpoint match
-                rate_limit = db.query(RateLimit).filter(
-                    RateLimit.endpoint == endpoint,
-                    RateLimit.tier == user_tier
-                ).first()
-                
-                # If not found, try default
-                if not rate_limit:
-                    rate_limit = db.query(RateLimit).filter(
-                        RateLimit.endpoint == "default",
-                        RateLimit.tier == user_tier
-                    ).first()
-                
+                configured = self._get_configured_limits(db)
+                rate_limit = configured.get((endpoint, user_tier)) or configured.get(("default", user_tier))
                 if rate_limit:
-                    return {
-                        "requests": rate_limit.requests,
-                        "window": rate_limit.window
-                    }
+                    return rate_limit
             except Exception as e:
                 logger.warning(f"Failed to get rate limits from database: {e}")
         
-        # Fallback to hardcoded limits
-        limits = {
-            # Authentication endpoints
-            "/api/v1/auth/login": {
-                "anonymous": {"requests": 5, "window": 300},  # 5 per 5 minutes
-                "standard": {"requests": 10, "window": 300},
-                "premium": {"requests": 20, "window": 300}
-            },
-            "/api/v1/auth/register": {
-                "anonymous": {"requests": 3, "window": 3600},  # 3 per hour
-                "standard": {"requests": 5, "window": 3600},
-                "premium": {"requests": 10, "window": 3600}
-            },
-            
-            # Image upload endpoint
-            "/api/v1/images": {
-                "anonymous": {"requests": 10, "window": 3600},  # 10 per hour
-                "standard": {"requests": 100, "window": 3600},  # 100 per hour
-                "premium": {"requests": 1000, "window": 3600}   # 1000 per hour
-            },
-            
-            # General API endpoints
-            "default": {
-                "anonymous": {"requests": 100, "window": 3600},  # 100 per hour
-                "standard": {"requests": 1000, "window": 3600},  # 1000 per hour
-                "premium": {"requests": 10000, "window": 3600}   # 10000 per hour
-            }
-        }
-        
-        # Get limits for specific endpoint or use default
-        endpoint_limits = limits.get(endpoint, limits["default"])
+        # Fallback to hardcoded limits for the endpoint, or the default ones
+        endpoint_limits = DEFAULT_RATE_LIMITS.get(endpoint, DEFAULT_RATE_LIMITS["default"])
         tier_limits = endpoint_limits.get(user_tier, endpoint_limits["anonymous"])
         
         return tier_limits
     
+    def _get_configured_limits(self, db) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """The rate_limits table keyed by (endpoint, tier), reloaded every RATE_LIMIT_CONFIG_TTL seconds."""
+        if self._configured_limits is None or time.time() - self._configured_limits_loaded > RATE_LIMIT_CONFIG_TTL:
+            from app.models.rate_limit import RateLimit
+            
+            rows = db.query(RateLimit.endpoint, RateLimit.tier, RateLimit.requests, RateLimit.window).all()
+            self._configured_limits = {
+                (row.endpoint, row.tier): {"requests": row.requests, "window": row.window}
+                for row in rows
+            }
+            self._configured_limits_loaded = time.time()
+        return self._configured_limits
+    
+    def reload_configured_limits(self):
+        """Drop the cached rate_limits table so the next lookup reads it again."""
+        self._configured_limits = None
+    
     def clear_limits(self, identifier: str = None, endpoint: str = None):
         """Clear rate limits for debugging/admin purposes."""
         if not self.redis_client:
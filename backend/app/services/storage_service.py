@@ -1,8 +1,10 @@
 import io
 import os
-from typing import Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Tuple, Optional, List
 from minio import Minio
 from minio.error import S3Error
+from minio.deleteobjects import DeleteObject
 from PIL import Image as PILImage
 import logging
 
@@ -43,24 +45,28 @@ class StorageService:
             logger.error(f"Failed to initialize MinIO client: {e}")
             raise
     
-    def upload_image_with_thumbnails(
+    def upload_original(
         self, 
-        file_data: bytes, 
+        file_obj: BinaryIO, 
+        file_size: int, 
         file_name: str, 
         content_type: str = 'image/jpeg'
-    ) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+    ) -> str:
         """
-        Upload an image and create thumbnails.
+        Upload an original image, streamed from file_obj so it is never held
+        in memory whole. Returns its URL.
+        """
+        return self._upload_stream(file_obj, file_size, file_name, content_type)
+    
+    def upload_thumbnails(self, file_name: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Create and upload the thumbnails for an already uploaded original.
         
         Returns:
-            Tuple of (original_url, small_url, medium_url, large_url)
+            Tuple of (small_url, medium_url, large_url)
         """
         try:
-            # Upload original image
-            original_url = self._upload_file(file_data, file_name, content_type)
-            
-            # Create thumbnails
-            image = PILImage.open(io.BytesIO(file_data))
+            image = PILImage.open(io.BytesIO(self.get_file(file_name)))
             base_name = os.path.splitext(file_name)[0]
             
             thumbnail_urls = {}
@@ -83,25 +89,28 @@ class StorageService:
                 thumbnail_urls[size_name] = thumbnail_url
             
             return (
-                original_url,
                 thumbnail_urls.get('small'),
                 thumbnail_urls.get('medium'),
                 thumbnail_urls.get('large')
             )
             
         except Exception as e:
-            logger.error(f"Failed to upload image with thumbnails: {e}")
+            logger.error(f"Failed to create thumbnails for {file_name}: {e}")
             raise
     
     def _upload_file(self, file_data: bytes, file_name: str, content_type: str) -> str:
         """Upload a file to MinIO and return its URL."""
+        return self._upload_stream(io.BytesIO(file_data), len(file_data), file_name, content_type)
+    
+    def _upload_stream(self, stream: BinaryIO, length: int, file_name: str, content_type: str) -> str:
+        """Upload length bytes read from stream to MinIO and return its URL."""
         try:
-            # Upload to MinIO
+            # Upload to MinIO; large files go up in parts as they are read
             result = self.client.put_object(
                 self.bucket_name,
                 file_name,
-                io.BytesIO(file_data),
-                len(file_data),
+                stream,
+                length,
                 content_type=content_type
             )
             
@@ -136,6 +145,35 @@ class StorageService:
             logger.error(f"Failed to delete file {file_name}: {e}")
             raise
     
+    def image_file_names(self, file_name: str) -> List[str]:
+        """Return the object keys for an image and its thumbnails."""
+        base_name = os.path.splitext(file_name)[0]
+        return [file_name] + [f"{base_name}_{size_name}.jpg" for size_name in ['small', 'medium', 'large']]
+    
+    def delete_files(self, file_names: List[str]):
+        """Delete many files from MinIO, batching up to 1000 keys per request."""
+        batches = [file_names[start:start + 1000] for start in range(0, len(file_names), 1000)]
+        if not batches:
+            return
+        
+        # Independent batches are sent concurrently so their round trips overlap
+        with ThreadPoolExecutor(max_workers=min(len(batches), 4)) as executor:
+            for errors in executor.map(self._delete_batch, batches):
+                for error in errors:
+                    if error.code == 'NoSuchKey':
+                        logger.warning(f"File not found for deletion: {error.name}")
+                    else:
+                        logger.error(f"Failed to delete file {error.name}: {error.message}")
+        logger.info(f"Deleted {len(file_names)} files")
+    
+    def _delete_batch(self, file_names: List[str]) -> list:
+        """Remove one batch of objects and return any per-object errors."""
+        # remove_objects is lazy; errors are only reported while iterating
+        return list(self.client.remove_objects(
+            self.bucket_name,
+            [DeleteObject(name) for name in file_names]
+        ))
+    
     def get_file(self, file_name: str) -> bytes:
         """Get a file from MinIO."""
         try:
@@ -0,0 +1,83 @@
+"""
+Buffered image view counts, flushed to the database periodically
+"""
+from collections import Counter
+import asyncio
+import logging
+import threading
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, func, update
+
+from app.core.database import SessionLocal
+from app.models.image import Image
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of the buffered view counts
+VIEW_FLUSH_INTERVAL = 10
+
+
+class ViewCounter:
+    """Counts image views in memory and adds them to images.views in batches"""
+
+    def __init__(self):
+        self.pending: Counter = Counter()
+        self.lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        """Start the periodic flush task; call from app startup"""
+        self.running = True
+        asyncio.get_running_loop().create_task(self._flush_worker())
+
+    def add(self, image_id: int) -> bool:
+        """Buffer one view; returns False if the caller should write it itself"""
+        if not self.running:
+            return False
+        with self.lock:
+            self.pending[image_id] += 1
+        return True
+
+    def pending_views(self, image_id: int) -> int:
+        """Views buffered for an image but not yet written"""
+        with self.lock:
+            return self.pending.get(image_id, 0)
+
+    async def _flush_worker(self):
+        while True:
+            await asyncio.sleep(VIEW_FLUSH_INTERVAL)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception as e:
+                logger.error(f"Failed to flush image view counts: {e}")
+
+    def flush(self):
+        """Write all buffered views, one UPDATE per image in a single executemany"""
+        with self.lock:
+            batch, self.pending = self.pending, Counter()
+        if not batch:
+            return
+
+        db = SessionLocal()
+        try:
+            images = Image.__table__
+            db.execute(
+                update(images)
+                .where(images.c.id == bindparam("image_id"))
+                .values(views=func.coalesce(images.c.views, 0) + bindparam("delta")),
+                [{"image_id": image_id, "delta": delta} for image_id, delta in batch.items()]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the counts back so the next flush retries them
+            with self.lock:
+                self.pending.update(batch)
+            raise
+        finally:
+            db.close()
+
+
+# Global view counter instance
+view_counter = ViewCounter()
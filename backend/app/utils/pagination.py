@@ -1,8 +1,13 @@
 """
 Pagination utilities for API endpoints
 """
-from typing import TypeVar, Generic, List, Optional
+import base64
+import json
+from datetime import datetime
+from typing import TypeVar, Generic, List, Optional, Tuple
+from fastapi import HTTPException, Response
 from pydantic import BaseModel
+from sqlalchemy import func, tuple_
 
 T = TypeVar("T")
 
@@ -50,6 +55,22 @@ def paginate_query(query, skip: int = 0, limit: int = 20):
     return query.offset(skip).limit(limit).all()
 
 
+def count_query(query) -> int:
+    """
+    Count the rows matched by a SQLAlchemy query
+    
+    Unlike query.count(), which wraps the whole statement in a
+    SELECT count(*) FROM (...) subquery, this selects count(*) directly.
+    
+    Args:
+        query: SQLAlchemy query object
+        
+    Returns:
+        Number of matching rows
+    """
+    return query.with_entities(func.count()).order_by(None).scalar()
+
+
 def get_pagination_params(
     skip: Optional[int] = 0,
     limit: Optional[int] = 20,
@@ -68,4 +89,118 @@ def get_pagination_params(
     """
     skip = max(0, skip or 0)
     limit = min(max_limit, max(1, limit or 20))
-    return skip, limit
\ No newline at end of file
+    return skip, limit
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Encode a (created_at, id) keyset position as an opaque cursor
+    
+    Args:
+        created_at: Timestamp of the last item on the page
+        id: ID of the last item on the page
+        
+    Returns:
+        URL-safe base64 cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor: Cursor string from a previous page
+        
+    Returns:
+        Tuple of (created_at, id)
+        
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_id_cursor(id: int) -> str:
+    """
+    Encode an id keyset position as an opaque cursor
+    
+    Args:
+        id: ID of the last item on the page
+        
+    Returns:
+        URL-safe base64 cursor string
+    """
+    return base64.urlsafe_b64encode(json.dumps([id]).encode()).decode()
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_id_cursor
+    
+    Args:
+        cursor: Cursor string from a previous page
+        
+    Returns:
+        The id to page past
+        
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        (id,) = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(id, int):
+            raise TypeError(id)
+        return id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def order_newest_first(query, model, skip: int, cursor: Optional[str]):
+    """
+    Order a query newest first and position it at the offset or cursor
+    
+    Args:
+        query: SQLAlchemy query object
+        model: Mapped class with created_at and id columns
+        skip: Number of items to skip when no cursor is given
+        cursor: Cursor from a previous page's X-Next-Cursor header
+        
+    Returns:
+        The ordered query, without a limit applied
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        return query.filter(tuple_(model.created_at, model.id) < decode_cursor(cursor))
+    return query.offset(skip)
+
+
+def paginate_newest_first(query, model, response: Response, skip: int, limit: int, cursor: Optional[str]):
+    """
+    Page a query newest first by offset, or by keyset when given a cursor
+    
+    With a cursor the page seeks past that (created_at, id) position
+    instead of scanning skip rows; the cursor for the next page is returned
+    in the X-Next-Cursor header when the page is full.
+    
+    Args:
+        query: SQLAlchemy query object
+        model: Mapped class with created_at and id columns
+        response: Response to set the X-Next-Cursor header on
+        skip: Number of items to skip when no cursor is given
+        limit: Maximum number of items to return
+        cursor: Cursor from a previous page's X-Next-Cursor header
+        
+    Returns:
+        List of results for the page
+    """
+    items = order_newest_first(query, model, skip, cursor).limit(limit).all()
+    if len(items) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(items[-1].created_at, items[-1].id)
+    return items
@@ -0,0 +1,26 @@
+"""images_created_at_id_index
+
+Revision ID: 002_images_created_at_id_index
+Revises: 001_baseline_schema
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002_images_created_at_id_index'
+down_revision: Union[str, None] = '001_baseline_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Composite index for keyset pagination on (created_at, id)
+    op.create_index('ix_images_created_at_id', 'images', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_images_created_at_id', table_name='images')
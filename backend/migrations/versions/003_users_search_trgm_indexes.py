@@ -0,0 +1,36 @@
+"""users_search_trgm_indexes
+
+Revision ID: 003_users_search_trgm_indexes
+Revises: 002_images_created_at_id_index
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_users_search_trgm_indexes'
+down_revision: Union[str, None] = '002_images_created_at_id_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram GIN indexes let ILIKE '%term%' use an index instead of a full scan
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in ('username', 'email', 'full_name'):
+        op.create_index(
+            f'ix_users_{column}_trgm',
+            'users',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    for column in ('username', 'email', 'full_name'):
+        op.drop_index(f'ix_users_{column}_trgm', table_name='users')
@@ -0,0 +1,33 @@
+"""listing_and_recent_activity_indexes
+
+Revision ID: 004_listing_and_recent_activity_indexes
+Revises: 003_users_search_trgm_indexes
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_listing_and_recent_activity_indexes'
+down_revision: Union[str, None] = '003_users_search_trgm_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Newest-first image listings filtered by privacy
+    op.create_index('ix_images_privacy_created_at', 'images', ['privacy', sa.text('created_at DESC')], unique=False)
+    
+    # "Last 24 hours" counts in the admin platform stats
+    op.create_index('ix_users_created_at', 'users', ['created_at'], unique=False)
+    op.create_index('ix_comments_created_at', 'comments', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comments_created_at', table_name='comments')
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_index('ix_images_privacy_created_at', table_name='images')
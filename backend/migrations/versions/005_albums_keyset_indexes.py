@@ -0,0 +1,28 @@
+"""albums_keyset_indexes
+
+Revision ID: 005_albums_keyset_indexes
+Revises: 004_listing_and_recent_activity_indexes
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_albums_keyset_indexes'
+down_revision: Union[str, None] = '004_listing_and_recent_activity_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination of public and per-owner album listings
+    op.create_index('ix_albums_privacy_id', 'albums', ['privacy', 'id'], unique=False)
+    op.create_index('ix_albums_owner_id_id', 'albums', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_albums_owner_id_id', table_name='albums')
+    op.drop_index('ix_albums_privacy_id', table_name='albums')
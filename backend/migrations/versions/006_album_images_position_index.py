@@ -0,0 +1,26 @@
+"""album_images_position_index
+
+Revision ID: 006_album_images_position_index
+Revises: 005_albums_keyset_indexes
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_album_images_position_index'
+down_revision: Union[str, None] = '005_albums_keyset_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Ordered album contents and MAX(position) lookups when appending
+    op.create_index('ix_album_images_album_id_position', 'album_images', ['album_id', 'position'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_album_images_album_id_position', table_name='album_images')
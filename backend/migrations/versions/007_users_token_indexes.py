@@ -0,0 +1,35 @@
+"""users_token_indexes
+
+Revision ID: 007_users_token_indexes
+Revises: 006_album_images_position_index
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_users_token_indexes'
+down_revision: Union[str, None] = '006_album_images_position_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Partial indexes: only rows with an outstanding token are indexed
+    op.create_index(
+        'ix_users_email_verification_token', 'users', ['email_verification_token'],
+        unique=False, postgresql_where=sa.text('email_verification_token IS NOT NULL')
+    )
+    op.create_index(
+        'ix_users_password_reset_token', 'users', ['password_reset_token'],
+        unique=False, postgresql_where=sa.text('password_reset_token IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_password_reset_token', table_name='users')
+    op.drop_index('ix_users_email_verification_token', table_name='users')
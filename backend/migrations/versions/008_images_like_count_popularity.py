@@ -0,0 +1,45 @@
+"""images_like_count_popularity
+
+Revision ID: 008_images_like_count_popularity
+Revises: 007_users_token_indexes
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_images_like_count_popularity'
+down_revision: Union[str, None] = '007_users_token_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Like counts kept on the image row instead of aggregated from likes
+    op.add_column('images', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE images SET like_count = counts.n "
+        "FROM (SELECT image_id, count(*) AS n FROM likes GROUP BY image_id) AS counts "
+        "WHERE counts.image_id = images.id"
+    )
+    
+    # Explore ranking, recomputed by Postgres whenever likes or views change
+    op.add_column('images', sa.Column(
+        'popularity_score', sa.Integer(),
+        sa.Computed('like_count + COALESCE(views, 0) / 10', persisted=True)
+    ))
+    op.create_index(
+        'ix_images_public_popularity', 'images',
+        [sa.text('popularity_score DESC'), sa.text('id DESC')],
+        unique=False, postgresql_where=sa.text("privacy = 'PUBLIC'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_images_public_popularity', table_name='images')
+    op.drop_column('images', 'popularity_score')
+    op.drop_column('images', 'like_count')
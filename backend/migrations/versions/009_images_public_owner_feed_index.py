@@ -0,0 +1,31 @@
+"""images_public_owner_feed_index
+
+Revision ID: 009_images_public_owner_feed_index
+Revises: 008_images_like_count_popularity
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_images_public_owner_feed_index'
+down_revision: Union[str, None] = '008_images_like_count_popularity'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Followed users' public images, newest first: one ordered range per owner
+    op.create_index(
+        'ix_images_public_owner_created_at', 'images',
+        ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False, postgresql_where=sa.text("privacy = 'PUBLIC'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_images_public_owner_created_at', table_name='images')
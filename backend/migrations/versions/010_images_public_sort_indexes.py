@@ -0,0 +1,39 @@
+"""images_public_sort_indexes
+
+Revision ID: 010_images_public_sort_indexes
+Revises: 009_images_public_owner_feed_index
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_images_public_sort_indexes'
+down_revision: Union[str, None] = '009_images_public_owner_feed_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so the gallery keeps serving while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_images_public_views', 'images', [sa.text('views DESC')],
+            unique=False, postgresql_where=sa.text("privacy = 'PUBLIC'"),
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_images_public_like_count', 'images', [sa.text('like_count DESC')],
+            unique=False, postgresql_where=sa.text("privacy = 'PUBLIC'"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_images_public_like_count', table_name='images', postgresql_concurrently=True)
+        op.drop_index('ix_images_public_views', table_name='images', postgresql_concurrently=True)
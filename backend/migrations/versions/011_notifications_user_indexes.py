@@ -0,0 +1,40 @@
+"""notifications_user_indexes
+
+Revision ID: 011_notifications_user_indexes
+Revises: 010_images_public_sort_indexes
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_notifications_user_indexes'
+down_revision: Union[str, None] = '010_images_public_sort_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Notifications are written constantly, so build without blocking inserts
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_user_created_at', 'notifications',
+            ['user_id', sa.text('created_at DESC')],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_notifications_user_unread_created_at', 'notifications',
+            ['user_id', sa.text('created_at DESC')],
+            unique=False, postgresql_where=sa.text("read = false"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notifications_user_unread_created_at', table_name='notifications', postgresql_concurrently=True)
+        op.drop_index('ix_notifications_user_created_at', table_name='notifications', postgresql_concurrently=True)
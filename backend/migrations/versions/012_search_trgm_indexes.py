@@ -0,0 +1,52 @@
+"""search_trgm_indexes
+
+Revision ID: 012_search_trgm_indexes
+Revises: 011_notifications_user_indexes
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_search_trgm_indexes'
+down_revision: Union[str, None] = '011_notifications_user_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram GIN indexes let the search suggestions' and tag search's
+    # ILIKE '%term%' use an index instead of a full scan
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for column in ('title', 'description'):
+            op.create_index(
+                f'ix_images_public_{column}_trgm',
+                'images',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_where=sa.text("privacy = 'PUBLIC'"),
+                postgresql_concurrently=True
+            )
+        op.create_index(
+            'ix_tags_name_trgm',
+            'tags',
+            ['name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tags_name_trgm', table_name='tags', postgresql_concurrently=True)
+        for column in ('title', 'description'):
+            op.drop_index(f'ix_images_public_{column}_trgm', table_name='images', postgresql_concurrently=True)
@@ -0,0 +1,49 @@
+"""popular_terms_view
+
+Revision ID: 013_popular_terms_view
+Revises: 012_search_trgm_indexes
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '013_popular_terms_view'
+down_revision: Union[str, None] = '012_search_trgm_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Word counts over public titles and descriptions, refreshed periodically
+    # by the app (app/services/popular_terms.py) instead of per request
+    op.execute("""
+        CREATE MATERIALIZED VIEW popular_terms AS
+        SELECT word, count(*) AS frequency
+        FROM (
+            SELECT unnest(string_to_array(lower(title), ' ')) AS word
+            FROM images
+            WHERE title IS NOT NULL
+            AND privacy = 'PUBLIC'
+            
+            UNION ALL
+            
+            SELECT unnest(string_to_array(lower(description), ' ')) AS word
+            FROM images
+            WHERE description IS NOT NULL
+            AND privacy = 'PUBLIC'
+        ) t
+        WHERE char_length(word) > 2
+        AND word NOT IN ('the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'man', 'men', 'put', 'say', 'she', 'too', 'use')
+        GROUP BY word
+    """)
+    # REFRESH ... CONCURRENTLY requires a unique index
+    op.create_index('ix_popular_terms_word', 'popular_terms', ['word'], unique=True)
+    op.execute("CREATE INDEX ix_popular_terms_frequency ON popular_terms (frequency DESC, word)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS popular_terms")
@@ -0,0 +1,72 @@
+"""stopwords_table
+
+Revision ID: 014_stopwords_table
+Revises: 013_popular_terms_view
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014_stopwords_table'
+down_revision: Union[str, None] = '013_popular_terms_view'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+STOPWORDS = (
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one',
+    'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old',
+    'see', 'two', 'who', 'boy', 'did', 'man', 'men', 'put', 'say', 'she', 'too', 'use',
+)
+
+WORDS_SQL = """
+    SELECT unnest(string_to_array(lower(title), ' ')) AS word
+    FROM images
+    WHERE title IS NOT NULL
+    AND privacy = 'PUBLIC'
+    
+    UNION ALL
+    
+    SELECT unnest(string_to_array(lower(description), ' ')) AS word
+    FROM images
+    WHERE description IS NOT NULL
+    AND privacy = 'PUBLIC'
+"""
+
+
+def create_popular_terms(word_filter: str) -> None:
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW popular_terms AS
+        SELECT word, count(*) AS frequency
+        FROM ({WORDS_SQL}) t
+        WHERE char_length(word) > 2
+        AND {word_filter}
+        GROUP BY word
+    """)
+    op.create_index('ix_popular_terms_word', 'popular_terms', ['word'], unique=True)
+    op.execute("CREATE INDEX ix_popular_terms_frequency ON popular_terms (frequency DESC, word)")
+
+
+def upgrade() -> None:
+    stopwords = op.create_table(
+        'stopwords',
+        sa.Column('word', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('word')
+    )
+    op.bulk_insert(stopwords, [{'word': word} for word in STOPWORDS])
+    
+    # Rebuild the view with a hash anti-join against the table instead of the
+    # inline NOT IN list, so stopwords can be edited without a deploy
+    op.execute("DROP MATERIALIZED VIEW popular_terms")
+    create_popular_terms("NOT EXISTS (SELECT 1 FROM stopwords s WHERE s.word = t.word)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW popular_terms")
+    create_popular_terms("word NOT IN (" + ", ".join(f"'{word}'" for word in STOPWORDS) + ")")
+    op.drop_table('stopwords')
@@ -0,0 +1,56 @@
+"""tags_usage_count
+
+Revision ID: 015_tags_usage_count
+Revises: 014_stopwords_table
+Create Date: 2026-10-16 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '015_tags_usage_count'
+down_revision: Union[str, None] = '014_stopwords_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Usage counts kept on the tag row instead of counted from image_tags
+    op.add_column('tags', sa.Column('usage_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE tags SET usage_count = counts.n "
+        "FROM (SELECT tag_id, count(*) AS n FROM image_tags GROUP BY tag_id) AS counts "
+        "WHERE counts.tag_id = tags.id"
+    )
+    
+    # Maintained by the database, so every path that adds or removes image
+    # tags (including cascades from image and user deletes) keeps it right
+    op.execute("""
+        CREATE FUNCTION bump_tag_usage() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE tags SET usage_count = usage_count + 1 WHERE id = NEW.tag_id;
+            ELSE
+                UPDATE tags SET usage_count = usage_count - 1 WHERE id = OLD.tag_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER image_tags_usage_count AFTER INSERT OR DELETE ON image_tags "
+        "FOR EACH ROW EXECUTE FUNCTION bump_tag_usage()"
+    )
+    
+    op.create_index('ix_tags_usage_count', 'tags', [sa.text('usage_count DESC'), 'name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tags_usage_count', table_name='tags')
+    op.execute("DROP TRIGGER image_tags_usage_count ON image_tags")
+    op.execute("DROP FUNCTION bump_tag_usage()")
+    op.drop_column('tags', 'usage_count')
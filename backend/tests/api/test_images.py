@@ -9,6 +9,9 @@ from PIL import Image as PILImage
 from app.main import app
 from app.models.user import User
 from app.models.image import Image, ImagePrivacy
+from sqlalchemy.orm import sessionmaker
+
+from app.api.api_v1.endpoints import images as images_endpoint
 from app.core.database import get_db
 from app.core.security import create_access_token
 
@@ -140,6 +143,61 @@ class TestImageProcessing:
         pass
 
 
+class TestThumbnailGeneration:
+    """Test suite for the background thumbnail job"""
+    
+    def create_uploaded_image(self, db: Session, test_user: User) -> Image:
+        """Helper to create an image as upload_image leaves it, before thumbnails exist"""
+        original_url = "http://storage/imglink/abc.jpg"
+        image = Image(
+            filename="abc.jpg",
+            url=original_url,
+            thumbnail_url=original_url,
+            medium_url=original_url,
+            large_url=original_url,
+            delete_hash="abc",
+            owner_id=test_user.id,
+        )
+        db.add(image)
+        db.commit()
+        db.refresh(image)
+        return image
+    
+    def test_failed_thumbnails_keep_original_urls(self, db: Session, test_user: User, monkeypatch):
+        """A failed thumbnail job leaves every size pointing at the original"""
+        image = self.create_uploaded_image(db, test_user)
+        
+        def fail(file_name):
+            raise RuntimeError("storage unavailable")
+        
+        monkeypatch.setattr(images_endpoint.storage_service, "upload_thumbnails", fail)
+        monkeypatch.setattr(images_endpoint, "SessionLocal", sessionmaker(bind=db.get_bind()))
+        
+        images_endpoint.generate_thumbnails(image.id, image.filename)
+        
+        db.refresh(image)
+        assert image.thumbnail_url == image.url
+        assert image.medium_url == image.url
+        assert image.large_url == image.url
+    
+    def test_thumbnails_replace_original_urls(self, db: Session, test_user: User, monkeypatch):
+        """A successful thumbnail job stores each size's URL"""
+        image = self.create_uploaded_image(db, test_user)
+        
+        monkeypatch.setattr(
+            images_endpoint.storage_service, "upload_thumbnails",
+            lambda file_name: ("http://s/small.jpg", "http://s/medium.jpg", "http://s/large.jpg")
+        )
+        monkeypatch.setattr(images_endpoint, "SessionLocal", sessionmaker(bind=db.get_bind()))
+        
+        images_endpoint.generate_thumbnails(image.id, image.filename)
+        
+        db.refresh(image)
+        assert image.thumbnail_url == "http://s/small.jpg"
+        assert image.medium_url == "http://s/medium.jpg"
+        assert image.large_url == "http://s/large.jpg"
+
+
 class TestImageSecurity:
     """Test suite for image security features"""
     
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.core import security
+from app.core.security import create_access_token, decode_token, verified_tokens
+
+
+class TestDecodeToken:
+    """Test suite for the verified token cache in decode_token"""
+
+    def setup_method(self):
+        verified_tokens.clear()
+
+    def teardown_method(self):
+        verified_tokens.clear()
+
+    def test_cached_payload_is_a_copy(self):
+        token = create_access_token(data={"sub": "testuser"})
+        decode_token(token)["sub"] = "someoneelse"
+        payload = decode_token(token)
+        payload["sub"] = "someoneelse"
+        assert decode_token(token)["sub"] == "testuser"
+
+    def test_expired_cached_payload_is_reverified(self):
+        token = create_access_token(data={"sub": "testuser"})
+        decode_token(token)
+        (key,) = verified_tokens
+        verified_tokens[key] = {"sub": "stale", "exp": time.time() - 1}
+        assert decode_token(token)["sub"] == "testuser"
+        assert verified_tokens[key]["sub"] == "testuser"
+
+    def test_expired_token_is_rejected(self):
+        token = create_access_token(data={"sub": "testuser"}, expires_delta=timedelta(seconds=-1))
+        with pytest.raises(ValueError):
+            decode_token(token)
+        assert not verified_tokens
+
+    def test_invalid_tokens_are_not_cached(self):
+        token = create_access_token(data={"sub": "testuser"})
+        for bad in ("not-a-token", token[:-2] + ("AA" if token[-2:] != "AA" else "BB")):
+            with pytest.raises(ValueError):
+                decode_token(bad)
+        assert not verified_tokens
+
+    def test_full_cache_evicts_oldest(self, monkeypatch):
+        monkeypatch.setattr(security, "VERIFIED_TOKEN_CACHE_SIZE", 10)
+        tokens = [create_access_token(data={"sub": f"user{i}"}) for i in range(11)]
+        for token in tokens:
+            decode_token(token)
+        assert len(verified_tokens) == 10 * 9 // 10 + 1
+        # The newest tokens stay cached, the oldest were evicted
+        subs = {payload["sub"] for payload in verified_tokens.values()}
+        assert "user10" in subs and "user9" in subs
+        assert "user0" not in subs
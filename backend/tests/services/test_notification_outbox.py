@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import notification_outbox as outbox_module
+from app.services.notification_outbox import NotificationOutbox
+from app.services.notification_service import NotificationService
+
+
+def notification_row(user_id: int) -> dict:
+    return {"user_id": user_id, "type": "comment", "title": "New comment", "message": "Nice"}
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Replace the database write with one that records each batch"""
+    batches = []
+
+    def write_batch(batch):
+        batches.append(list(batch))
+        return []
+
+    monkeypatch.setattr(NotificationOutbox, "_write_batch", staticmethod(write_batch))
+    return batches
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def one(self):
+        (row,) = self.rows
+        return row
+
+
+class FakeSession:
+    """Session whose multi-row inserts fail, as does any row for bad_user_id"""
+
+    def __init__(self, bad_user_id):
+        self.bad_user_id = bad_user_id
+        self.committed = []
+        self.rollbacks = 0
+        self.closed = False
+
+    def scalars(self, statement, rows):
+        if len(rows) > 1 or rows[0]["user_id"] == self.bad_user_id:
+            raise Exception("insert failed")
+        self.pending = [SimpleNamespace(**row) for row in rows]
+        return FakeResult(self.pending)
+
+    def commit(self):
+        self.committed.extend(self.pending)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class TestNotificationOutbox:
+    """Test suite for the batching notification outbox"""
+
+    def test_enqueue_before_start_writes_inline(self):
+        outbox = NotificationOutbox()
+        assert outbox.enqueue(notification_row(1)) is False
+
+    @pytest.mark.asyncio
+    async def test_enqueue_when_full_writes_inline(self, monkeypatch, written):
+        monkeypatch.setattr(outbox_module, "NOTIFICATION_QUEUE_SIZE", 2)
+        outbox = NotificationOutbox()
+        outbox.start()
+
+        assert [outbox.enqueue(notification_row(i)) for i in range(3)] == [True, True, False]
+
+        await outbox.drain()
+        assert [row["user_id"] for batch in written for row in batch] == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_enqueue_after_drain_writes_inline(self, written):
+        outbox = NotificationOutbox()
+        outbox.start()
+        await outbox.drain()
+
+        assert outbox.enqueue(notification_row(1)) is False
+        assert written == []
+
+    @pytest.mark.asyncio
+    async def test_rows_are_written_in_batches(self, monkeypatch, written):
+        monkeypatch.setattr(outbox_module, "NOTIFICATION_BATCH_SIZE", 3)
+        outbox = NotificationOutbox()
+        outbox.start()
+
+        for i in range(7):
+            assert outbox.enqueue(notification_row(i))
+        await outbox.drain()
+
+        assert [len(batch) for batch in written] == [3, 3, 1]
+
+    @pytest.mark.asyncio
+    async def test_drain_writes_every_queued_row(self, written):
+        outbox = NotificationOutbox()
+        outbox.start()
+
+        for i in range(500):
+            assert outbox.enqueue(notification_row(i))
+        await outbox.drain()
+
+        assert [row["user_id"] for batch in written for row in batch] == list(range(500))
+        assert outbox.pending == 0
+        assert outbox.worker.done()
+
+    def test_failed_batch_is_retried_row_by_row(self, monkeypatch):
+        session = FakeSession(bad_user_id=2)
+        monkeypatch.setattr(outbox_module, "SessionLocal", lambda: session)
+        monkeypatch.setattr(outbox_module.manager, "is_user_online", lambda user_id: False)
+        invalidated = []
+        monkeypatch.setattr(NotificationService, "invalidate_unread_count", lambda *ids: invalidated.extend(ids))
+
+        NotificationOutbox._write_batch([notification_row(1), notification_row(2), notification_row(3)])
+
+        # The batch insert and the bad row are rolled back; the other rows are kept
+        assert [n.user_id for n in session.committed] == [1, 3]
+        assert session.rollbacks == 2
+        assert sorted(invalidated) == [1, 3]
+        assert session.closed
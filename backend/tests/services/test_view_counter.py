@@ -0,0 +1,93 @@
+import pytest
+
+from app.services import view_counter as view_counter_module
+from app.services.view_counter import ViewCounter
+
+
+class FakeSession:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.executed = []
+        self.committed = False
+        self.rolled_back = False
+        self.closed = False
+
+    def execute(self, statement, params):
+        if self.fail:
+            raise Exception("database unavailable")
+        self.executed.append(params)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+def running_counter() -> ViewCounter:
+    counter = ViewCounter()
+    # start() also schedules the flush task; tests call flush() directly
+    counter.running = True
+    return counter
+
+
+class TestViewCounter:
+    """Test suite for the buffered image view counter"""
+
+    def test_add_when_not_running_writes_inline(self):
+        counter = ViewCounter()
+        assert counter.add(1) is False
+        assert counter.pending_views(1) == 0
+
+    def test_pending_views_sums_unflushed_hits(self):
+        counter = running_counter()
+        for image_id in (1, 1, 2, 1):
+            assert counter.add(image_id) is True
+
+        assert counter.pending_views(1) == 3
+        assert counter.pending_views(2) == 1
+        assert counter.pending_views(3) == 0
+
+    def test_flush_writes_and_clears_pending(self, monkeypatch):
+        session = FakeSession()
+        monkeypatch.setattr(view_counter_module, "SessionLocal", lambda: session)
+        counter = running_counter()
+        for image_id in (1, 1, 2):
+            counter.add(image_id)
+
+        counter.flush()
+
+        assert sorted(session.executed[0], key=lambda row: row["image_id"]) == [
+            {"image_id": 1, "delta": 2},
+            {"image_id": 2, "delta": 1},
+        ]
+        assert session.committed and session.closed
+        assert counter.pending_views(1) == 0
+
+    def test_flush_with_nothing_pending_skips_the_database(self, monkeypatch):
+        def no_session():
+            raise AssertionError("flush opened a session with nothing to write")
+
+        monkeypatch.setattr(view_counter_module, "SessionLocal", no_session)
+        running_counter().flush()
+
+    def test_failed_flush_puts_counts_back(self, monkeypatch):
+        session = FakeSession(fail=True)
+        monkeypatch.setattr(view_counter_module, "SessionLocal", lambda: session)
+        counter = running_counter()
+        for image_id in (1, 1, 2):
+            counter.add(image_id)
+
+        with pytest.raises(Exception, match="database unavailable"):
+            counter.flush()
+
+        assert session.rolled_back and session.closed
+        assert counter.pending_views(1) == 2
+        assert counter.pending_views(2) == 1
+
+        # Views counted after the failure add to the restored ones
+        counter.add(1)
+        assert counter.pending_views(1) == 3
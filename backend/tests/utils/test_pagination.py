@@ -0,0 +1,54 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import decode_cursor, decode_id_cursor, encode_cursor, encode_id_cursor
+
+
+def raw_cursor(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+class TestCursor:
+    """Test suite for keyset pagination cursors"""
+
+    def test_round_trip(self):
+        created_at = datetime(2024, 5, 17, 12, 30, 45, 123456)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(datetime(2024, 5, 17, 12, 30, 45), 10 ** 12)
+        assert all(c.isalnum() or c in "-_=" for c in cursor)
+
+    @pytest.mark.parametrize("cursor", [
+        "not a cursor",
+        "é",
+        raw_cursor("not json"),
+        raw_cursor("5"),
+        raw_cursor("[1]"),
+        raw_cursor('["2024-05-17T12:30:45", 1, 2]'),
+        raw_cursor('["yesterday", 1]'),
+        raw_cursor('[null, 1]'),
+        raw_cursor('["2024-05-17T12:30:45", "one"]'),
+    ])
+    def test_malformed_cursor_is_a_400(self, cursor):
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor)
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == "Invalid cursor"
+
+    def test_id_round_trip(self):
+        assert decode_id_cursor(encode_id_cursor(42)) == 42
+
+    @pytest.mark.parametrize("cursor", [
+        "42",
+        raw_cursor("[]"),
+        raw_cursor('["42"]'),
+        raw_cursor("[1, 2]"),
+    ])
+    def test_malformed_id_cursor_is_a_400(self, cursor):
+        with pytest.raises(HTTPException) as exc_info:
+            decode_id_cursor(cursor)
+        assert exc_info.value.status_code == 400